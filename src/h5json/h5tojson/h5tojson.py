@@ -12,12 +12,94 @@
 import sys
 import json
 import argparse
+import functools
+import operator
 import os.path as op
 import tempfile
+import types
 import logging
-import logging.handlers
+import numpy as np
 from h5json import Hdf5db
 from h5json import hdf5dtype
+from h5json.hdf5db import DSET_CACHE_SIZE
+
+INDENT = 4  # number of spaces per indent level in json output
+# total memory for chunk caches.  Hdf5db keeps DSET_CACHE_SIZE datasets open
+# besides the one being read, and each open dataset has its own chunk cache
+RDCC_TOTAL_NBYTES = 160 * 1024 * 1024
+RDCC_NBYTES = RDCC_TOTAL_NBYTES // (DSET_CACHE_SIZE + 1)  # per open dataset
+RDCC_NSLOTS = 100003  # number of chunk cache hash slots (a prime)
+STREAM_SIZE = 1024 * 1024  # datasets with more elements are written in blocks
+OUT_BUFFER_SIZE = 1024 * 1024  # size of the output buffer in bytes
+
+# keys of db items that are not part of the HDF5/JSON output
+_LINK_STRIP = ("ctime", "mtime", "href")
+_GROUP_STRIP = ("ctime", "mtime", "linkCount", "attributeCount", "id")
+
+
+def encodeJson(value, level=0):
+    """
+    Return the same text as json.dumps(value, sort_keys=True, indent=INDENT),
+    with each line after the first indented as if nested level deep.
+
+    The stdlib only uses its C encoder when indent is None, so containers are
+    walked here and lists of scalars (e.g. dataset and attribute values) are
+    passed to the C encoder with a line break and indent as item separator.
+
+    numpy arrays are encoded as their tolist() value, one row at a time, so
+    the complete list of Python objects for a large array is never created.
+    """
+    pad = " " * (INDENT * level)
+    inner_pad = pad + " " * INDENT
+    if isinstance(value, np.ndarray):
+        if value.ndim < 2 or value.size == 0:
+            return encodeJson(value.tolist(), level)
+        items = [inner_pad + encodeJson(row, level + 1) for row in value]
+        return "[\n" + ",\n".join(items) + "\n" + pad + "]"
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        members = []
+        for key in sorted(value):
+            text = encodeJson(value[key], level + 1)
+            members.append(inner_pad + json.dumps(key) + ": " + text)
+        return "{\n" + ",\n".join(members) + "\n" + pad + "}"
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "[]"
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            items = [inner_pad + encodeJson(item, level + 1) for item in value]
+            return "[\n" + ",\n".join(items) + "\n" + pad + "]"
+        text = json.dumps(value, separators=(",\n" + inner_pad, ": "))
+        return "[\n" + inner_pad + text[1:-1] + "\n" + pad + "]"
+    return json.dumps(value)
+
+
+def toJsonValue(value):
+    """
+    default function for json.dumps, to encode numpy arrays as lists
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(
+        "Object of type " + type(value).__name__ + " is not JSON serializable"
+    )
+
+
+def encodeLine(value):
+    """
+    Return compact, single line JSON text for value (for --ndjson output)
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=toJsonValue)
+
+
+def hasBlocks(value):
+    """
+    Return True if value is a dict with dataset values that are read in blocks
+    """
+    if not isinstance(value, dict):
+        return False
+    return any(isinstance(member, types.GeneratorType) for member in value.values())
 
 
 class DumpJson:
@@ -25,104 +107,115 @@ class DumpJson:
     DumpJson - return json representation of all objects within the given file
     """
 
-    def __init__(self, db, app_logger=None, options=None):
+    def __init__(self, db, app_logger=None, options=None, out=None):
         self.options = options
         self.db = db
         if app_logger:
             self.log = app_logger
         else:
             self.log = logging.getLogger()
-        self.json = {}
+        if out is None:
+            out = sys.stdout
+        self.out = out
 
-    def dumpAttribute(self, col_name, uuid, attr_name):
-        self.log.info("dumpAttribute: [" + attr_name + "]")
-        item = self.db.getAttributeItem(col_name, uuid, attr_name)
+    def getAttributeResponse(self, item):
+        attr_name = item["name"]
+        self.log.info("dumpAttribute: [%s]", attr_name)
         response = {"name": attr_name}
         typeItem = item["type"]
-        response["type"] = hdf5dtype.getTypeResponse(typeItem)
+        response["type"] = hdf5dtype.getTypeResponseCached(typeItem)
         response["shape"] = item["shape"]
         if not self.options.D:
             if "value" not in item:
-                self.log.warning("no value key in attribute: " + attr_name)
+                self.log.warning("no value key in attribute: %s", attr_name)
             else:
                 response["value"] = item[
                     "value"
                 ]  # dump values unless header -D was passed
         return response
 
-    def dumpAttributes(self, col_name, uuid):
-        attr_list = self.db.getAttributeItems(col_name, uuid)
-        self.log.info("dumpAttributes: " + uuid)
+    def dumpAttribute(self, col_name, uuid, attr_name):
+        item = self.db.getAttributeItem(col_name, uuid, attr_name)
+        return self.getAttributeResponse(item)
+
+    def dumpAttributes(self, col_name, uuid, obj=None):
+        # fetch the attribute values along with the rest of the item, so
+        # each attribute is only read once
+        includeData = not self.options.D
+        if obj is None:
+            attr_list = self.db.getAttributeItems(
+                col_name, uuid, includeData=includeData
+            )
+        else:
+            attr_list = self.db.getAttributeItemsByObj(
+                obj, uuid, includeData=includeData
+            )
+        self.log.info("dumpAttributes: %s", uuid)
         items = []
         for attr in attr_list:
-            item = self.dumpAttribute(col_name, uuid, attr["name"])
+            item = self.getAttributeResponse(attr)
             items.append(item)
 
         return items
 
     def dumpLink(self, uuid, name):
         item = self.db.getLinkItemByUuid(uuid, name)
-        for key in ("ctime", "mtime", "href"):
-            if key in item:
-                del item[key]
+        for key in _LINK_STRIP:
+            item.pop(key, None)
         return item
 
-    def dumpLinks(self, uuid):
-        link_list = self.db.getLinkItems(uuid)
-        items = []
-        for link in link_list:
-            item = self.dumpLink(uuid, link["title"])
-            items.append(item)
+    def dumpLinks(self, uuid, grp=None):
+        # getLinkItems already returns the complete item for each link,
+        # so there's no need to fetch each link again by name
+        if grp is None:
+            items = self.db.getLinkItems(uuid)
+        else:
+            items = self.db.getLinkItemsByObj(grp)
+        for item in items:
+            for key in _LINK_STRIP:
+                item.pop(key, None)
         return items
 
     def dumpGroup(self, uuid):
-        item = self.db.getGroupItemByUuid(uuid)
+        # open the group once and use it for the item, attributes and links
+        grp = self.db.getGroupObjByUuid(uuid)
+        item = self.db.getGroupItemByObj(grp, uuid)
         if "alias" in item:
             alias = item["alias"]
             if alias:
-                self.log.info("dumpGroup alias: [" + alias[0] + "]")
-        for key in ("ctime", "mtime", "linkCount", "attributeCount", "id"):
-            if key in item:
-                del item[key]
-        attributes = self.dumpAttributes("groups", uuid)
+                self.log.info("dumpGroup alias: [%s]", alias[0])
+        for key in _GROUP_STRIP:
+            item.pop(key, None)
+        attributes = self.dumpAttributes("groups", uuid, obj=grp)
         if attributes:
             item["attributes"] = attributes
-        links = self.dumpLinks(uuid)
+        links = self.dumpLinks(uuid, grp=grp)
         if links:
             item["links"] = links
         return item
 
     def dumpGroups(self):
-        groups = {}
-        item = self.dumpGroup(self.root_uuid)
-        groups[self.root_uuid] = item
-        uuids = self.db.getCollection("groups")
-        for uuid in uuids:
-            item = self.dumpGroup(uuid)
-            groups[uuid] = item
-
-        self.json["groups"] = groups
+        uuids = [self.root_uuid]
+        uuids.extend(self.db.getCollection("groups"))
+        self.writeCollection("groups", uuids, self.dumpGroup)
 
     def dumpDataset(self, uuid):
         response = {}
-        self.log.info("dumpDataset: " + uuid)
+        self.log.info("dumpDataset: %s", uuid)
         item = self.db.getDatasetItemByUuid(uuid)
         if "alias" in item:
             alias = item["alias"]
             if alias:
-                self.log.info("dumpDataset alias: [" + alias[0] + "]")
+                self.log.info("dumpDataset alias: [%s]", alias[0])
             response["alias"] = item["alias"]
 
         typeItem = item["type"]
-        response["type"] = hdf5dtype.getTypeResponse(typeItem)
+        response["type"] = hdf5dtype.getTypeResponseCached(typeItem)
         shapeItem = item["shape"]
         shape_rsp = {}
-        num_elements = 1
         shape_rsp["class"] = shapeItem["class"]
         if "dims" in shapeItem:
             shape_rsp["dims"] = shapeItem["dims"]
-            for dim in shapeItem["dims"]:
-                num_elements *= dim
         if "maxdims" in shapeItem:
             maxdims = []
             for dim in shapeItem["maxdims"]:
@@ -141,8 +234,16 @@ class DumpJson:
             response["attributes"] = attributes
 
         if not (self.options.D or self.options.d):
-            if num_elements > 0:
-                value = self.db.getDatasetValuesByUuid(uuid)
+            num_elements = functools.reduce(operator.mul, shapeItem.get("dims", ()), 1)
+            if num_elements > STREAM_SIZE:
+                # read when the dataset is written, a block at a time, so the
+                # values of a large dataset are never all held in memory
+                value = self.db.getDatasetValueBlocksByUuid(
+                    uuid, format="numpy", block_size=STREAM_SIZE
+                )
+                response["value"] = value
+            elif num_elements > 0:
+                value = self.db.getDatasetValuesByUuid(uuid, format="numpy")
                 response["value"] = value  # dump values unless header flag was passed
             else:
                 response["value"] = []  # empty list
@@ -150,20 +251,21 @@ class DumpJson:
 
     def dumpDatasets(self):
         uuids = self.db.getCollection("datasets")
-        if uuids:
-            datasets = {}
-            for uuid in uuids:
-                item = self.dumpDataset(uuid)
-                datasets[uuid] = item
-
-            self.json["datasets"] = datasets
+        if self.options.D or self.options.d:
+            # no values to read, so the read order doesn't matter
+            order_key = None
+        else:
+            # each dataset is read and written out in the order its data is
+            # stored in the file, rather than in uuid order
+            order_key = self.getDatasetOrder
+        self.writeCollection("datasets", uuids, self.dumpDataset, order_key=order_key)
 
     def dumpDatatype(self, uuid):
         response = {}
         item = self.db.getCommittedTypeItemByUuid(uuid)
         response["alias"] = item["alias"]
         typeItem = item["type"]
-        response["type"] = hdf5dtype.getTypeResponse(typeItem)
+        response["type"] = hdf5dtype.getTypeResponseCached(typeItem)
         attributes = self.dumpAttributes("datatypes", uuid)
         if attributes:
             response["attributes"] = attributes
@@ -171,13 +273,154 @@ class DumpJson:
 
     def dumpDatatypes(self):
         uuids = self.db.getCollection("datatypes")
-        if uuids:
-            datatypes = {}
-            for uuid in uuids:
-                item = self.dumpDatatype(uuid)
-                datatypes[uuid] = item
-
-            self.json["datatypes"] = datatypes
+        self.writeCollection("datatypes", uuids, self.dumpDatatype)
+
+    def encodeValue(self, value, level):
+        """
+        Return JSON text for value, indented as if nested level deep
+        in the output document.
+        """
+        return encodeJson(value, level)
+
+    def writeValue(self, value, level):
+        """
+        Write JSON text for value, indented as if nested level deep.
+        Generators in a dict (dataset values read in blocks) are written
+        one block at a time.
+        """
+        if not hasBlocks(value):
+            self.out.write(self.encodeValue(value, level))
+            return
+        pad = " " * (INDENT * level)
+        inner_pad = pad + " " * INDENT
+        self.out.write("{\n")
+        count = 0
+        for key in sorted(value):
+            if count > 0:
+                self.out.write(",\n")
+            self.out.write(inner_pad + json.dumps(key) + ": ")
+            member = value[key]
+            if isinstance(member, types.GeneratorType):
+                self.writeBlocks(member, level + 1)
+            else:
+                self.out.write(self.encodeValue(member, level + 1))
+            count += 1
+        self.out.write("\n" + pad + "}")
+
+    def writeBlocks(self, blocks, level):
+        """
+        Write the blocks of rows yielded by blocks as one JSON list
+        """
+        pad = " " * (INDENT * level)
+        count = 0
+        for block in blocks:
+            if not isinstance(block, (list, tuple, np.ndarray)):
+                # not a list of rows (e.g. unsupported opaque values)
+                self.out.write(self.encodeValue(block, level))
+                return
+            if len(block) == 0:
+                continue
+            text = self.encodeValue(block, level)
+            # strip the "[\n" and "\n" + pad + "]" around the rows of the block
+            text = text[2 : -(len(pad) + 2)]
+            if count > 0:
+                self.out.write(",\n")
+            else:
+                self.out.write("[\n")
+            self.out.write(text)
+            count += 1
+        if count > 0:
+            self.out.write("\n" + pad + "]")
+        else:
+            self.out.write("[]")
+
+    def writeRecord(self, col_name, uuid, item):
+        """
+        Write an item as one line of --ndjson output: a JSON object with
+        the item as the only member of its collection.
+        """
+        self.out.write("{" + json.dumps(col_name) + ":{" + json.dumps(uuid) + ":")
+        if not hasBlocks(item):
+            self.out.write(encodeLine(item))
+        else:
+            count = 0
+            for key in sorted(item):
+                self.out.write("," if count > 0 else "{")
+                self.out.write(json.dumps(key) + ":")
+                member = item[key]
+                if isinstance(member, types.GeneratorType):
+                    self.writeLineBlocks(member)
+                else:
+                    self.out.write(encodeLine(member))
+                count += 1
+            self.out.write("}")
+        self.out.write("}}\n")
+
+    def writeLineBlocks(self, blocks):
+        """
+        Write the blocks of rows yielded by blocks as one compact JSON list
+        """
+        count = 0
+        for block in blocks:
+            if not isinstance(block, (list, tuple, np.ndarray)):
+                # not a list of rows (e.g. unsupported opaque values)
+                self.out.write(encodeLine(block))
+                return
+            if len(block) == 0:
+                continue
+            self.out.write("," if count > 0 else "[")
+            self.out.write(encodeLine(block)[1:-1])
+            count += 1
+        self.out.write("]" if count > 0 else "[]")
+
+    def writeMember(self, key, value, last=False):
+        """
+        Write a key/value member of the top-level JSON object
+        """
+        self.out.write(" " * INDENT + json.dumps(key) + ": ")
+        self.out.write(self.encodeValue(value, 1))
+        if not last:
+            self.out.write(",")
+        self.out.write("\n")
+
+    def getDatasetOrder(self, uuid):
+        """
+        Sort key to read datasets in the order their data is stored in the file.
+        Datasets without an offset (e.g. not allocated) go last.
+        """
+        offset = self.db.getDatasetOffsetByUuid(uuid)
+        if offset is None:
+            return (1, 0)
+        return (0, offset)
+
+    def writeCollection(self, col_name, uuids, dump_fn, order_key=None):
+        """
+        Write the items of a collection as members of the top-level JSON object.
+        Each item is created by dump_fn and written out as soon as it is
+        complete, so only one item is held in memory at a time.
+        Items are written in uuid order, or in order_key order if given
+        (order_key is called once per uuid).
+        Nothing is written for an empty collection.
+        """
+        if not uuids:
+            return
+        uuids = sorted(uuids)
+        if order_key is not None:
+            uuids.sort(key=order_key)  # stable, so ties stay in uuid order
+        items = map(dump_fn, uuids)
+        if self.options.ndjson:
+            for uuid, item in zip(uuids, items):
+                self.writeRecord(col_name, uuid, item)
+            return
+        self.out.write(" " * INDENT + json.dumps(col_name) + ": {\n")
+        count = 0
+        for uuid, item in zip(uuids, items):
+            if count > 0:
+                self.out.write(",\n")
+            self.out.write(" " * (INDENT * 2) + json.dumps(uuid) + ": ")
+            self.writeValue(item, 2)
+            count += 1
+        self.out.write("\n" + " " * INDENT + "},\n")
 
     def dumpFile(self):
 
@@ -185,16 +428,31 @@ class DumpJson:
 
         db_version_info = self.db.getVersionInfo()
 
-        self.json["apiVersion"] = db_version_info["hdf5-json-version"]
-        self.json["root"] = self.root_uuid
-
-        self.dumpGroups()
+        if self.options.ndjson:
+            # one JSON object per line, combining the members of all the
+            # lines gives the same document as the default output
+            header = {"apiVersion": db_version_info["hdf5-json-version"]}
+            header["root"] = self.root_uuid
+            self.out.write(encodeLine(header) + "\n")
+            self.dumpDatasets()
+            self.dumpDatatypes()
+            self.dumpGroups()
+            return
+
+        # write members in sorted key order, so the output is the same as
+        # json.dumps(..., sort_keys=True, indent=4) of the complete document
+        # (except for the order of datasets when values are dumped)
+        self.out.write("{\n")
+        self.writeMember("apiVersion", db_version_info["hdf5-json-version"])
 
         self.dumpDatasets()
 
         self.dumpDatatypes()
 
-        print(json.dumps(self.json, sort_keys=True, indent=4))
+        self.dumpGroups()
+
+        self.writeMember("root", self.root_uuid, last=True)
+        self.out.write("}\n")
 
 
 def getTempFileName():
@@ -208,13 +466,21 @@ def getTempFileName():
 
 
 def main():
-    parser = argparse.ArgumentParser(usage="%(prog)s [-h] [-D|-d] <hdf5_file>")
+    parser = argparse.ArgumentParser(
+        usage="%(prog)s [-h] [-D|-d] [--ndjson] <hdf5_file>"
+    )
     parser.add_argument("-D", action="store_true", help="surpress all data output")
     parser.add_argument(
         "-d",
         action="store_true",
         help="surpress data output for" + " datasets (but not attribute values)",
     )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="write one JSON object per line (JSON Lines) instead of a single"
+        + " JSON document",
+    )
     parser.add_argument("filename", nargs="+", help="HDF5 to be converted to json")
     args = parser.parse_args()
 
@@ -236,9 +502,25 @@ def main():
 
     dbFilename = getTempFileName()
     log.info("Using dbFile: " + dbFilename)
-    with Hdf5db(filename, dbFilePath=dbFilename, readonly=True, app_logger=log) as db:
-        dumper = DumpJson(db, app_logger=log, options=args)
-        dumper.dumpFile()
+    with Hdf5db(
+        filename,
+        dbFilePath=dbFilename,
+        readonly=True,
+        app_logger=log,
+        rdcc_nbytes=RDCC_NBYTES,
+        rdcc_nslots=RDCC_NSLOTS,
+    ) as db:
+        # write through a large buffer directly on top of the stdout file
+        # descriptor, rather than in many small writes through sys.stdout
+        with open(
+            sys.stdout.fileno(),
+            "w",
+            buffering=OUT_BUFFER_SIZE,
+            encoding="utf-8",
+            closefd=False,
+        ) as out:
+            dumper = DumpJson(db, app_logger=log, options=args, out=out)
+            dumper.dumpFile()
 
 
 if __name__ == "__main__":
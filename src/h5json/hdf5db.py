@@ -18,16 +18,23 @@ import os.path as op
 import os
 import json
 import logging
+import collections
+import copy
 from .hdf5dtype import getTypeItem, createDataType, getItemSize
 from .apiversion import _apiver
 
 
-# global dictionary to direct back to the Hdf5db instance by filename
-# (needed for visititems callback)
-# Will break in multi-threaded context
-_db = {}
-
 UUID_LEN = 36  # length for uuid strings
+OBJ_CACHE_SIZE = 1000  # number of recently used groups and datatypes kept open
+DSET_CACHE_SIZE = 4  # number of recently used datasets kept open
+PATH_CACHE_SIZE = 4096  # number of path to uuid lookups remembered
+TIMESTAMP_CACHE_SIZE = 100000  # number of timestamp lookups remembered
+QUERY_CACHE_SIZE = 256  # number of compiled queries remembered
+QUERY_BLOCK_BYTES = 64 << 20  # amount of data read per block for queries
+MDC_MIN_SIZE = 8 << 20  # lower bound of the HDF5 metadata cache, in bytes
+MDC_MAX_SIZE = 64 << 20  # upper bound of the HDF5 metadata cache, in bytes
+REF_DTYPE = h5py.special_dtype(ref=h5py.Reference)
+REGREF_DTYPE = h5py.special_dtype(ref=h5py.RegionReference)
 
 # standard compress filters
 _HDF_FILTERS = {
@@ -48,6 +55,9 @@ _HDF_FILTERS = {
     32000: {"class": "H5Z_FILTER_LZF", "alias": "lzf"},
 }
 
+# filter class by filter id
+_HDF_FILTER_CLASSES = {k: v["class"] for k, v in _HDF_FILTERS.items()}
+
 _HDF_FILTER_OPTION_ENUMS = {
     "coding": {
         h5py.h5z.SZIP_EC_OPTION_MASK: "H5_SZIP_EC_OPTION_MASK",
@@ -60,6 +70,42 @@ _HDF_FILTER_OPTION_ENUMS = {
     },
 }
 
+# (option name, option value enums) pairs by filter id
+_HDF_FILTER_OPTIONS = {
+    k: tuple((name, _HDF_FILTER_OPTION_ENUMS.get(name, {})) for name in v["options"])
+    for k, v in _HDF_FILTERS.items()
+    if "options" in v
+}
+
+# type classes whose numpy values convert to json with tolist()
+_NUMERIC_CLASSES = ("H5T_INTEGER", "H5T_FLOAT", "H5T_ENUM")
+
+# namespace queries are evaluated in, they only refer to the rows read
+_QUERY_GLOBALS = {"__builtins__": {}}
+
+# numpy kinds of compound fields that np.asarray can fill from tuples
+_SIMPLE_FIELD_KINDS = ("b", "i", "u", "f", "S")
+
+# dataset creation property values
+_ALLOC_TIMES = {
+    h5py.h5d.ALLOC_TIME_DEFAULT: "H5D_ALLOC_TIME_DEFAULT",
+    h5py.h5d.ALLOC_TIME_LATE: "H5D_ALLOC_TIME_LATE",
+    h5py.h5d.ALLOC_TIME_EARLY: "H5D_ALLOC_TIME_EARLY",
+    h5py.h5d.ALLOC_TIME_INCR: "H5D_ALLOC_TIME_INCR",
+}
+
+_FILL_TIMES = {
+    h5py.h5d.FILL_TIME_ALLOC: "H5D_FILL_TIME_ALLOC",
+    h5py.h5d.FILL_TIME_NEVER: "H5D_FILL_TIME_NEVER",
+    h5py.h5d.FILL_TIME_IFSET: "H5D_FILL_TIME_IFSET",
+}
+
+_LAYOUT_CLASSES = {
+    h5py.h5d.COMPACT: "H5D_COMPACT",
+    h5py.h5d.CONTIGUOUS: "H5D_CONTIGUOUS",
+    h5py.h5d.CHUNKED: "H5D_CHUNKED",
+}
+
 # h5py supported filters
 _H5PY_FILTERS = {
     "gzip": 1,
@@ -73,11 +119,6 @@ _H5PY_FILTERS = {
 _H5PY_COMPRESSION_FILTERS = ("gzip", "lzf", "szip")
 
 
-def visitObj(path, obj):
-    hdf5db = _db[obj.file.filename]
-    hdf5db.visit(path, obj)
-
-
 class Hdf5db:
     """
     This class is used to manage UUID lookup tables for primary HDF objects (Groups, Datasets,
@@ -148,6 +189,8 @@ class Hdf5db:
         root_uuid=None,
         update_timestamps=True,
         userid=None,
+        rdcc_nbytes=None,
+        rdcc_nslots=None,
     ):
         if app_logger:
             self.log = app_logger
@@ -173,10 +216,63 @@ class Hdf5db:
 
         self.update_timestamps = update_timestamps
 
-        self.f = h5py.File(filePath, mode, libver="latest")
+        locking = None  # use the HDF5 default
+        if mode == "r":
+            # the file is never modified in read-only mode, so skip the file
+            # lock (which is slow or unsupported on some network file systems)
+            locking = False
+
+        # rdcc_nbytes and rdcc_nslots set the size of the raw data chunk
+        # cache of each dataset, None uses the HDF5 default
+        self.f = h5py.File(
+            filePath,
+            mode,
+            libver="latest",
+            locking=locking,
+            rdcc_nbytes=rdcc_nbytes,
+            rdcc_nslots=rdcc_nslots,
+        )
+        self.setMetadataCacheConfig(self.f)
 
         self.root_uuid = root_uuid
 
+        # recently used objects by collection and uuid, so an object that is accessed several
+        # times in a row (e.g. for its item, attributes and values) is only
+        # opened once.  Only a few datasets are kept, since each open dataset
+        # holds its own chunk cache
+        self.obj_cache = collections.OrderedDict()
+        self.dset_cache = collections.OrderedDict()
+        self.db_groups = {}  # db groups by name, see getDbGroup
+        self.addr_map = {}  # object address to uuid, see getUUIDByAddress
+        self.path_cache = {}  # path to uuid, cleared when links change
+        self.acl_cache = {}  # acl rows by uuid, see getAclRows
+        self.timestamps = {}  # (group, name) to timestamp, see getTimeStamp
+        self.timestamps_loaded = set()  # groups read in full, see loadTimeStamps
+        self.deleted = set()  # timestamp names of items deleted, see isDeleted
+        self.initialized = False  # set once initFile has set up the db
+        self.null_ref = None  # see getNullReference
+        self.null_regref = None  # see getNullRegionReference
+        self.dataset_props = {}  # creation props json by uuid
+        self.hdf5_creation_props = {}  # see getHDF5DatasetCreationProperties
+        self.committed_types = {}  # see getCommittedTypeItemByTypeId
+        self.committed_type_items = {}  # see getCommittedTypeItemByUuid
+        self.obj_refs = {}  # (collection, uuid) to ref or path, see getObjectByUuid
+        self.attr_names = {}  # attribute names by uuid, see getAttributeNames
+        self.dataset_types = {}  # type item and size by uuid, see getDatasetTypeItem
+        self.queries = {}  # compiled queries, see getQueryCode
+        # getDataValue conversion by type class
+        self.data_value_getters = {
+            "H5T_COMPOUND": self.getCompoundDataValue,
+            "H5T_VLEN": self.getVlenDataValue,
+            "H5T_REFERENCE": self.getReferenceDataValue,
+            "H5T_OPAQUE": self.getOpaqueDataValue,
+            "H5T_ARRAY": self.getArrayDataValue,
+            "H5T_INTEGER": self.getNumericDataValue,
+            "H5T_FLOAT": self.getNumericDataValue,
+            "H5T_ENUM": self.getNumericDataValue,
+            "H5T_STRING": self.getStringDataValue,
+        }
+
         if self.readonly:
             # for read-only files, add a dot in front of the name to be used as
             # the db file.  This won't collide with actual data files, since
@@ -192,12 +288,32 @@ class Hdf5db:
             if not op.isfile(dbFilePath):
                 dbMode = "w"
             self.log.info("dbFilePath: " + dbFilePath + " mode: " + dbMode)
-            self.dbf = h5py.File(dbFilePath, dbMode)
+            # the db file has an attribute for every object, use the latest
+            # format so large numbers of attributes are stored efficiently
+            self.dbf = h5py.File(dbFilePath, dbMode, libver="latest")
         else:
             self.dbf = None  # for read only
-        # create a global reference to this class
-        # so visitObj can call back
-        _db[filePath] = self
+
+        try:
+            self.initFile()
+        except Exception:
+            self.f.close()
+            if self.dbf:
+                self.dbf.close()
+            raise
+
+    def setMetadataCacheConfig(self, f):
+        """
+        Start the metadata cache of the file larger than the HDF5 default.
+        Most of the work here is reading object headers and attributes, and
+        looking up object names walks the headers of the whole file.
+        """
+        config = f.id.get_mdc_config()
+        config.set_initial_size = True
+        config.initial_size = MDC_MIN_SIZE
+        config.min_size = MDC_MIN_SIZE
+        config.max_size = max(config.max_size, MDC_MAX_SIZE)
+        f.id.set_mdc_config(config)
 
     def __enter__(self):
         self.log.info("Hdf5db __enter")
@@ -205,32 +321,43 @@ class Hdf5db:
 
     def __exit__(self, type, value, traceback):
         self.log.info("Hdf5db __exit")
-        filename = self.f.filename
+        self.obj_cache.clear()
+        self.dset_cache.clear()
+        self.db_groups.clear()
+        self.addr_map.clear()
+        self.path_cache.clear()
+        self.acl_cache.clear()
+        self.timestamps.clear()
+        self.timestamps_loaded.clear()
+        self.deleted.clear()
+        self.dataset_props.clear()
+        self.hdf5_creation_props.clear()
+        self.committed_types.clear()
+        self.committed_type_items.clear()
+        self.obj_refs.clear()
+        self.attr_names.clear()
+        self.dataset_types.clear()
+        self.queries.clear()
         self.f.flush()
         self.f.close()
         if self.dbf:
             self.dbf.flush()
             self.dbf.close()
-        del _db[filename]
 
     def getTimeStampName(self, uuid, objType="object", name=None):
-        ts_name = uuid
-        if objType != "object":
-            if len(name) == 0:
-                self.log.error("empty name passed to setCreateTime")
-                raise Exception("bad setCreateTimeParameter")
-            if objType == "attribute":
-                ts_name += "_attr:["
-                ts_name += name
-                ts_name += "]"
-            elif objType == "link":
-                ts_name += "_link:["
-                ts_name += name
-                ts_name += "]"
-            else:
-                msg = "Bad objType passed to setCreateTime"
-                self.log.error(msg)
-                raise IOError(errno.EIO, msg)
+        if objType == "object":
+            return uuid
+        if len(name) == 0:
+            self.log.error("empty name passed to setCreateTime")
+            raise Exception("bad setCreateTimeParameter")
+        if objType == "attribute":
+            ts_name = f"{uuid}_attr:[{name}]"
+        elif objType == "link":
+            ts_name = f"{uuid}_link:[{name}]"
+        else:
+            msg = "Bad objType passed to setCreateTime"
+            self.log.error(msg)
+            raise IOError(errno.EIO, msg)
         return ts_name
 
     """
@@ -249,13 +376,12 @@ class Hdf5db:
     def setCreateTime(self, uuid, objType="object", name=None, timestamp=None):
         if not self.update_timestamps:
             return
-        ctime_grp = self.dbGrp["{ctime}"]
         ts_name = self.getTimeStampName(uuid, objType, name)
         if timestamp is None:
             timestamp = time.time()
-        if ts_name in ctime_grp.attrs:
+        if self.getTimeStamp("{ctime}", ts_name) is not None:
             self.log.warning("modifying create time for object: " + ts_name)
-        ctime_grp.attrs.create(ts_name, timestamp, dtype="int64")
+        self.setTimeStamp("{ctime}", ts_name, timestamp)
 
     """
       getCreateTime - gets the create time timestamp for the
@@ -269,16 +395,11 @@ class Hdf5db:
     """
 
     def getCreateTime(self, uuid, objType="object", name=None, useRoot=True):
-        ctime_grp = self.dbGrp["{ctime}"]
         ts_name = self.getTimeStampName(uuid, objType, name)
-        timestamp = None
-        if ts_name in ctime_grp.attrs:
-            timestamp = ctime_grp.attrs[ts_name]
-        elif useRoot:
+        timestamp = self.getTimeStamp("{ctime}", ts_name)
+        if timestamp is None and useRoot:
             # return root timestamp
-            root_uuid = self.dbGrp.attrs["rootUUID"]
-            if root_uuid in ctime_grp.attrs:
-                timestamp = ctime_grp.attrs[root_uuid]
+            timestamp = self.getTimeStamp("{ctime}", self.root_uuid)
         return timestamp
 
     """
@@ -296,11 +417,10 @@ class Hdf5db:
     def setModifiedTime(self, uuid, objType="object", name=None, timestamp=None):
         if not self.update_timestamps:
             return
-        mtime_grp = self.dbGrp["{mtime}"]
         ts_name = self.getTimeStampName(uuid, objType, name)
         if timestamp is None:
             timestamp = time.time()
-        mtime_grp.attrs.create(ts_name, timestamp, dtype="int64")
+        self.setTimeStamp("{mtime}", ts_name, timestamp)
 
     """
       getModifiedTime - gets the modified time timestamp for the
@@ -314,22 +434,92 @@ class Hdf5db:
     """
 
     def getModifiedTime(self, uuid, objType="object", name=None, useRoot=True):
-        mtime_grp = self.dbGrp["{mtime}"]
         ts_name = self.getTimeStampName(uuid, objType, name)
-        timestamp = None
-        if ts_name in mtime_grp.attrs:
-            timestamp = mtime_grp.attrs[ts_name]
-        else:
+        timestamp = self.getTimeStamp("{mtime}", ts_name)
+        if timestamp is None:
             # return create time if no modified time has been set
-            ctime_grp = self.dbGrp["{ctime}"]
-            if ts_name in ctime_grp.attrs:
-                timestamp = ctime_grp.attrs[ts_name]
-            elif useRoot:
+            timestamp = self.getTimeStamp("{ctime}", ts_name)
+            if timestamp is None and useRoot:
                 # return root timestamp
-                root_uuid = self.dbGrp.attrs["rootUUID"]
-                timestamp = mtime_grp.attrs[root_uuid]
+                timestamp = self.getTimeStamp("{mtime}", self.root_uuid)
+                if timestamp is None:
+                    raise KeyError(self.root_uuid)
+        return timestamp
+
+    def isDeleted(self, uuid, objType="object", name=None):
+        """
+        Return True if the given object, attribute or link was deleted.  Only
+        used once the item has not been found.  Items deleted by this
+        instance are remembered, otherwise the timestamps are checked.
+        """
+        if self.getTimeStampName(uuid, objType, name) in self.deleted:
+            return True
+        return bool(self.getModifiedTime(uuid, objType, name, useRoot=False))
+
+    def setDeleted(self, uuid, objType="object", name=None):
+        """
+        Note that the given object, attribute or link has been deleted
+        """
+        self.deleted.add(self.getTimeStampName(uuid, objType, name))
+        self.setModifiedTime(uuid, objType, name)
+
+    def getTimeStamp(self, grp_name, ts_name):
+        """
+        Return the timestamp attribute ts_name of the db group grp_name
+        ("{ctime}" or "{mtime}"), or None if it isn't set.  Lookups are
+        remembered, including misses, and setTimeStamp keeps them current.
+        """
+        key = (grp_name, ts_name)
+        if key in self.timestamps:
+            return self.timestamps[key]
+        if grp_name in self.timestamps_loaded:
+            return None  # every timestamp of the group is in the cache
+        grp = self.getDbGroup(grp_name)
+        timestamp = None
+        if ts_name in grp.attrs:
+            timestamp = grp.attrs[ts_name]
+        if len(self.timestamps) >= TIMESTAMP_CACHE_SIZE:
+            self.timestamps.clear()
+            self.timestamps_loaded.clear()
+        self.timestamps[key] = timestamp
         return timestamp
 
+    def loadTimeStamps(self, grp_name):
+        """
+        Read all the timestamps of the db group grp_name into the cache in
+        one pass, so that getTimeStamp doesn't need to go to the file for
+        them (or for the names that have no timestamp).  Skipped if the
+        group has more timestamps than the cache holds.
+        """
+        if grp_name in self.timestamps_loaded:
+            return
+        grp = self.getDbGroup(grp_name)
+        num_attrs = h5py.h5o.get_info(grp.id).num_attrs
+        if len(self.timestamps) + num_attrs >= TIMESTAMP_CACHE_SIZE:
+            return
+        for ts_name, timestamp in grp.attrs.items():
+            self.timestamps[(grp_name, ts_name)] = timestamp
+        self.timestamps_loaded.add(grp_name)
+
+    def setTimeStamp(self, grp_name, ts_name, timestamp):
+        """
+        Set the timestamp attribute ts_name of the db group grp_name
+        """
+        grp = self.getDbGroup(grp_name)
+        grp.attrs.create(ts_name, timestamp, dtype="int64")
+        self.timestamps[(grp_name, ts_name)] = np.int64(timestamp)
+
+    def getDbGroup(self, name):
+        """
+        Return the db group with the given name (e.g. "{ctime}").  The group
+        is only looked up the first time, since these are used on most calls.
+        """
+        grp = self.db_groups.get(name)
+        if grp is None:
+            grp = self.dbGrp[name]
+            self.db_groups[name] = grp
+        return grp
+
     """
       getAclGroup - return the db group "{acl}" if present,
         otherwise return None
@@ -338,12 +528,21 @@ class Hdf5db:
     def getAclGroup(self, create=False):
         if not self.dbGrp:
             return None  # file not initialized
-        if "{acl}" in self.dbGrp:
-            return self.dbGrp["{acl}"]
+        if "{acl}" in self.db_groups or "{acl}" in self.dbGrp:
+            return self.getDbGroup("{acl}")
         if not create:
             return None
         self.dbGrp.create_group("{acl}")
-        return self.dbGrp["{acl}"]
+        return self.getDbGroup("{acl}")
+
+    def getTmpGroup(self):
+        """
+        Return the db group "{tmp}" used for scratch objects, creating it
+        the first time it is needed
+        """
+        if "{tmp}" not in self.db_groups and "{tmp}" not in self.dbGrp:
+            self.dbGrp.create_group("{tmp}")
+        return self.getDbGroup("{tmp}")
 
     """
       getAclDtype - return detype for ACL
@@ -378,6 +577,7 @@ class Hdf5db:
             return None
 
         # create dataset
+        self.acl_cache.pop(obj_uuid, None)
         dt = self.getAclDtype()
         acl_group.create_dataset(obj_uuid, (0,), dtype=dt, maxshape=(None,))
         return acl_group[obj_uuid]
@@ -400,12 +600,8 @@ class Hdf5db:
     """
 
     def convertAclNdArrayToDict(self, acl_ndarray):
-        fields = acl_ndarray.dtype.fields.keys()
-        acl = {}
-        for field in fields:
-            value = int(acl_ndarray[field])
-            acl[field] = value
-        return acl
+        # item() converts all the fields to python ints in one call
+        return dict(zip(acl_ndarray.dtype.names, acl_ndarray.item()))
 
     def getDefaultAcl(self):
         """Get default acl - returns dict obj"""
@@ -470,38 +666,42 @@ class Hdf5db:
             return None if not found
         """
         acl = None
-        acl_dset = self.getAclDataset(obj_uuid)
+        acls = self.getAclRows(obj_uuid)
 
-        if acl_dset:
-            # iterate through elements, looking for user_id
-            acls = acl_dset[...]
-            num_acls = acl_dset.shape[0]
-            acl = None
-            for i in range(num_acls):
-                item = acls[i]
-                if item["userid"] == userid:
-                    acl = item
-                    break
+        if acls is not None:
+            # look for user_id
+            matches = np.flatnonzero(acls["userid"] == userid)
+            if matches.size:
+                acl = acls[matches[0]]
 
         if acl is not None:
             acl = self.convertAclNdArrayToDict(acl)
         return acl
 
+    def getAclRows(self, obj_uuid):
+        """
+        Return all the ACL elements for the given uuid as a numpy array, or
+        None if there is no ACL dataset.  The rows are read once and kept
+        until setAcl changes them.
+        """
+        if obj_uuid in self.acl_cache:
+            return self.acl_cache[obj_uuid]
+        acls = None
+        acl_dset = self.getAclDataset(obj_uuid)
+        if acl_dset:
+            acls = acl_dset[...]
+        self.acl_cache[obj_uuid] = acls
+        return acls
+
     def getAcls(self, obj_uuid):
         """
         getAcls - get all acls for given uuid
         """
         acls = []
-        acl_dset = self.getAclDataset(obj_uuid)
+        items = self.getAclRows(obj_uuid)
 
-        if acl_dset:
-            # iterate through elements, looking for user_id
-            num_acls = acl_dset.shape[0]
-
-            for i in range(num_acls):
-                item = acl_dset[i]
-                acl = self.convertAclNdArrayToDict(item)
-                acls.append(acl)
+        if items is not None:
+            acls = [self.convertAclNdArrayToDict(item) for item in items]
 
         return acls
 
@@ -518,44 +718,46 @@ class Hdf5db:
 
         userid = acl["userid"]
 
-        # iterate through elements, looking for user_id
-        acls = acl_dset[...]
+        # look for user_id in the current elements
+        acls = self.getAclRows(obj_uuid)
         num_acls = acl_dset.shape[0]
 
-        user_index = None
-
-        for i in range(num_acls):
-            item = acls[i]
-            if item["userid"] == userid:
-                # update this element
-                user_index = i
-                break
+        matches = np.flatnonzero(acls["userid"] == userid)
 
-        if user_index is None:
+        if matches.size:
+            # update this element
+            user_index = int(matches[0])
+            row = acls[user_index : user_index + 1].copy()
+        else:
             # userid not found - add row
             acl_dset.resize(((num_acls + 1),))
             user_index = num_acls
+            row = np.zeros((1,), dtype=acls.dtype)
 
         # update the acl dataset
-        item = acl_dset[user_index]
         for field in acl.keys():
-            item[field] = acl[field]
-        acl_dset[user_index] = item  # save back to the file
+            row[field] = acl[field]
+        acl_dset[user_index : user_index + 1] = row  # save back to the file
+        self.acl_cache.pop(obj_uuid, None)
 
     def initFile(self):
         # self.log.info("initFile")
+        if self.initialized:
+            return
         if self.readonly:
             self.dbGrp = self.dbf
             if "{groups}" in self.dbf:
                 # file already initialized
-                self.root_uuid = self.dbGrp.attrs["rootUUID"]
+                self.root_uuid = self.readRootUUID()
+                self.initialized = True
                 return
 
         else:
             if "__db__" in self.f:
                 # file already initialized
                 self.dbGrp = self.f["__db__"]
-                self.root_uuid = self.dbGrp.attrs["rootUUID"]
+                self.root_uuid = self.readRootUUID()
+                self.initialized = True
                 return  # already initialized
             self.dbGrp = self.f.create_group("__db__")
 
@@ -575,50 +777,104 @@ class Hdf5db:
         self.setCreateTime(self.root_uuid, timestamp=ctime)
         self.setModifiedTime(self.root_uuid, timestamp=mtime)
 
-        self.f.visititems(visitObj)
+        # visit collects the db entries for each object, and they're written
+        # all together afterwards
+        self.visited = []
+        h5py.h5o.visit(self.f.id, self.visit, info=True)
+        self.saveVisited()
+        self.initialized = True
 
-    def visit(self, path, obj):
-        name = obj.__class__.__name__
-        if len(path) >= 6 and path[:6] == "__db__":
+    def readRootUUID(self):
+        """
+        Return the root uuid stored in the db group as a str
+        """
+        root_uuid = self.dbGrp.attrs["rootUUID"]
+        if root_uuid and type(root_uuid) is not str:
+            # convert bytes to unicode
+            root_uuid = root_uuid.decode("utf-8")
+        return root_uuid
+
+    def visit(self, name, info):
+        """
+        h5o.visit callback - gets the object name (bytes) and ObjInfo, so the
+        objects don't need to be opened.
+        """
+        if name.startswith(b"__db__"):
             return  # don't include the db objects
-        self.log.info("visit: " + path + " name: " + name)
-        col = None
-        if name == "Group":
-            col = self.dbGrp["{groups}"].attrs
-        elif name == "Dataset":
-            col = self.dbGrp["{datasets}"].attrs
-        elif name == "Datatype":
-            col = self.dbGrp["{datatypes}"].attrs
+        path = name.decode("utf-8")
+        self.log.info("visit: " + path)
+        col_name = None
+        if info.type == h5py.h5o.TYPE_GROUP:
+            col_name = "{groups}"
+        elif info.type == h5py.h5o.TYPE_DATASET:
+            col_name = "{datasets}"
+        elif info.type == h5py.h5o.TYPE_NAMED_DATATYPE:
+            col_name = "{datatypes}"
         else:
-            msg = "Unknown object type: " + __name__ + " found during scan of HDF5 file"
+            msg = "Unknown object type: " + path + " found during scan of HDF5 file"
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
-        uuid1 = uuid.uuid1()  # create uuid
-        id = str(uuid1)
-        addrGrp = self.dbGrp["{addr}"]
         if not self.readonly:
             # storing db in the file itself, so we can link to the object directly
-            col[id] = obj.ref  # save attribute ref to object
+            ref = h5py.h5r.create(self.f.id, name, h5py.h5r.OBJECT)
         else:
             # store path to object
-            col[id] = obj.name
-        addr = h5py.h5o.get_info(obj.id).addr
-        # store reverse map as an attribute
-        addrGrp.attrs[str(addr)] = id
+            ref = "/" + path
+        self.visited.append((col_name, ref, info.addr))
+
+    def saveVisited(self):
+        """
+        Write the db attributes for the objects found by visit: the ref (or
+        path for read-only files) of each object in its collection group, and
+        the reverse map of address to uuid in the {addr} group.
+        """
+        # create random (version 4) uuids for all the objects from one read
+        # of os.urandom, rather than calling uuid.uuid1() for each object
+        raw = os.urandom(16 * len(self.visited))
+        ids = [
+            str(uuid.UUID(bytes=raw[i : i + 16], version=4))
+            for i in range(0, len(raw), 16)
+        ]
+        visited = [
+            (name, id, ref, addr) for (name, ref, addr), id in zip(self.visited, ids)
+        ]
+        if not self.readonly:
+            ref_dtype = h5py.ref_dtype
+        else:
+            ref_dtype = h5py.string_dtype()
+        for col_name in ("{groups}", "{datasets}", "{datatypes}"):
+            items = [(id, ref) for (name, id, ref, addr) in visited if name == col_name]
+            self.createAttributes(self.getDbGroup(col_name), items, ref_dtype)
+        items = [(str(addr), id) for (name, id, ref, addr) in visited]
+        self.createAttributes(self.getDbGroup("{addr}"), items, h5py.string_dtype())
+        for name, id, ref, addr in visited:
+            self.addr_map[addr] = id
+            self.obj_refs[(name, id)] = ref
+        self.visited = []
+
+    def createAttributes(self, grp, items, dtype):
+        """
+        Create a scalar attribute of the given dtype in grp for each
+        (name, value) in items.  The attributes must not exist yet.
+        The HDF5 types and dataspace are only set up once, which is much
+        quicker than setting grp.attrs[name] for each attribute.
+        """
+        htype = h5py.h5t.py_create(dtype, logical=True)
+        mtype = h5py.h5t.py_create(dtype)  # in-memory representation
+        space = h5py.h5s.create_simple(())
+        for name, value in items:
+            attr = h5py.h5a.create(grp.id, name.encode("utf-8"), htype, space)
+            attr.write(np.array(value, dtype=dtype), mtype=mtype)
+            attr.close()
 
     #
     # Get Datset creation properties
     #
     def getDatasetCreationProps(self, dset_uuid):
         prop_list = {}
-        if "{dataset_props}" not in self.dbGrp:
-            # no, group, so no properties
-            return prop_list  # return empty dict
-        dbPropsGrp = self.dbGrp["{dataset_props}"]
-
-        if dset_uuid not in dbPropsGrp.attrs:
+        prop_str = self.getDatasetCreationPropsStr(dset_uuid)
+        if prop_str is None:
             return prop_list  # return empty dict
-        prop_str = dbPropsGrp.attrs[dset_uuid]
         # expand json string
         try:
             prop_list = json.loads(prop_str)
@@ -627,7 +883,7 @@ class Hdf5db:
                 "Unable to load creation properties for dataset:["
                 + dset_uuid
                 + "]: "
-                + ve.message
+                + str(ve)
             )
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
@@ -638,14 +894,27 @@ class Hdf5db:
             for prop_filter in prop_filters:
                 if "class" not in prop_filter:
                     filter_id = prop_filter["id"]
-                    if filter_id in _HDF_FILTERS:
-                        hdf_filter = _HDF_FILTERS[filter_id]
-                        prop_filter["class"] = hdf_filter["class"]
-                    else:
-                        prop_filter["class"] = "H5Z_FILTER_USER"
+                    prop_filter["class"] = _HDF_FILTER_CLASSES.get(
+                        filter_id, "H5Z_FILTER_USER"
+                    )
 
         return prop_list
 
+    def getDatasetCreationPropsStr(self, dset_uuid):
+        """
+        Return the JSON string of creation properties stored for the dataset,
+        or None.  The properties are write once, so lookups are remembered.
+        """
+        if dset_uuid in self.dataset_props:
+            return self.dataset_props[dset_uuid]
+        prop_str = None
+        if "{dataset_props}" in self.db_groups or "{dataset_props}" in self.dbGrp:
+            dbPropsGrp = self.getDbGroup("{dataset_props}")
+            if dset_uuid in dbPropsGrp.attrs:
+                prop_str = dbPropsGrp.attrs[dset_uuid]
+        self.dataset_props[dset_uuid] = prop_str
+        return prop_str
+
     #
     # Set dataset creation property
     #
@@ -656,7 +925,7 @@ class Hdf5db:
             return
         if "{dataset_props}" not in self.dbGrp:
             self.dbGrp.create_group("{dataset_props}")
-        dbPropsGrp = self.dbGrp["{dataset_props}"]
+        dbPropsGrp = self.getDbGroup("{dataset_props}")
         if dset_uuid in dbPropsGrp.attrs:
             # this should be write once
             msg = (
@@ -668,71 +937,50 @@ class Hdf5db:
             raise IOError(errno.EIO, msg)
         prop_str = json.dumps(prop_dict)
         dbPropsGrp.attrs[dset_uuid] = prop_str
+        self.dataset_props[dset_uuid] = prop_str
 
     def getUUIDByAddress(self, addr):
-        if "{addr}" not in self.dbGrp:
+        if addr in self.addr_map:
+            return self.addr_map[addr]
+        if "{addr}" not in self.db_groups and "{addr}" not in self.dbGrp:
             self.log.error("expected to find {addr} group")
             return None
-        addrGrp = self.dbGrp["{addr}"]
+        addrGrp = self.getDbGroup("{addr}")
         obj_uuid = None
         if str(addr) in addrGrp.attrs:
             obj_uuid = addrGrp.attrs[str(addr)]
         if obj_uuid and type(obj_uuid) is not str:
             # convert bytes to unicode
             obj_uuid = obj_uuid.decode("utf-8")
+        if obj_uuid:
+            self.addr_map[addr] = obj_uuid
         return obj_uuid
 
-    def getNumLinksToObjectInGroup(self, grp, obj):
+    def setUUIDByAddress(self, addr, obj_uuid):
         """
-        Get the number of links in a group to an object
+        Store the reverse map of object address to uuid
         """
-        objAddr = h5py.h5o.get_info(obj.id).addr
-        numLinks = 0
-        for name in grp:
-            try:
-                child = grp[name]
-            except KeyError:
-                # UDLink? Ignore for now
-                self.log.info("ignoring link (UDLink?): " + name)
-                continue
-
-            addr = h5py.h5o.get_info(child.id).addr
-            if addr == objAddr:
-                numLinks = numLinks + 1
-
-        return numLinks
+        addrGrp = self.getDbGroup("{addr}")
+        addrGrp.attrs[str(addr)] = obj_uuid
+        self.addr_map[addr] = obj_uuid
 
     def getNumLinksToObject(self, obj):
         """
         Get the number of links to the given object
         """
-        self.initFile()
-        groups = self.dbGrp["{groups}"]
-        numLinks = 0
-        # iterate through each group in the file and unlink tgt if it is linked
-        # by the group
-        for uuidName in groups:
-            # iterate through anonymous groups
-            grp = groups[uuidName]
-            nLinks = self.getNumLinksToObjectInGroup(grp, obj)
-            if nLinks > 0:
-                numLinks += nLinks
-        for uuidName in groups.attrs:
-            # now non anonymous groups
-            grpRef = groups.attrs[uuidName]
-            grp = self.f[grpRef]  # dereference
-            nLinks = self.getNumLinksToObjectInGroup(grp, obj)
-            if nLinks > 0:
-                numLinks += nLinks
-        # finally, check the root group
-        root = self.getObjByPath("/")
-        nLinks = self.getNumLinksToObjectInGroup(root, obj)
-        numLinks += nLinks
+        # the object header keeps count of the hard links to the object
+        info = h5py.h5o.get_info(obj.id)
+        numLinks = info.rc
+        # anonymous objects are linked from their db collection, don't count that
+        obj_uuid = self.getUUIDByAddress(info.addr)
+        if obj_uuid is not None:
+            dbCol = self.getDBCollection(obj_uuid)
+            if dbCol is not None and obj_uuid in dbCol:
+                numLinks -= 1
 
         return numLinks
 
     def getUUIDByPath(self, path):
-        self.initFile()
         self.log.info("getUUIDByPath: [" + path + "]")
         if len(path) >= 6 and path[:6] == "__db__":
             msg = "getUUIDByPath called with invalid path: [" + path + "]"
@@ -740,15 +988,18 @@ class Hdf5db:
             raise IOError(errno.EIO, msg)
         if path == "/":
             # just return the root UUID
-            root_uuid = self.dbGrp.attrs["rootUUID"]
-            if root_uuid and type(root_uuid) is not str:
-                # convert bytes to unicode
-                root_uuid = root_uuid.decode("utf-8")
-            return root_uuid
+            return self.root_uuid
+
+        if path in self.path_cache:
+            return self.path_cache[path]
 
         obj = self.f[path]  # will throw KeyError if object doesn't exist
         addr = h5py.h5o.get_info(obj.id).addr
         obj_uuid = self.getUUIDByAddress(addr)
+        if obj_uuid:
+            if len(self.path_cache) >= PATH_CACHE_SIZE:
+                self.path_cache.clear()
+            self.path_cache[path] = obj_uuid
         return obj_uuid
 
     def getObjByPath(self, path):
@@ -763,24 +1014,50 @@ class Hdf5db:
             msg = "Unexpectd error, invalid col_type: [" + col_type + "]"
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
-        if col_type == "groups" and obj_uuid == self.dbGrp.attrs["rootUUID"]:
+        if col_type == "groups" and obj_uuid == self.root_uuid:
             return self.f["/"]  # returns root group
 
+        if col_type == "datasets":
+            cache, cache_size = self.dset_cache, DSET_CACHE_SIZE
+        else:
+            cache, cache_size = self.obj_cache, OBJ_CACHE_SIZE
+        obj = cache.get((col_type, obj_uuid))
+        if obj is not None and obj.id.valid:
+            cache.move_to_end((col_type, obj_uuid))  # most recently used
+            return obj
+
         obj = None  # Group, Dataset, or Datatype
         col_name = "{" + col_type + "}"
         # get the collection group for this collection type
-        col = self.dbGrp[col_name]
-        if obj_uuid in col.attrs:
+        col = self.getDbGroup(col_name)
+        # refs (or paths) of linked objects are remembered, the uuids not
+        # found here are anonymous objects or don't exist
+        ref = self.obj_refs.get((col_name, obj_uuid))
+        if ref is None and obj_uuid in col.attrs:
             ref = col.attrs[obj_uuid]
+            self.obj_refs[(col_name, obj_uuid)] = ref
+        if ref is not None:
             obj = self.f[ref]  # this works for read-only as well
         elif obj_uuid in col:
             # anonymous object
             obj = col[obj_uuid]
 
+        if obj is not None:
+            cache[(col_type, obj_uuid)] = obj
+            if len(cache) > cache_size:
+                cache.popitem(last=False)  # drop the least recently used
+
         return obj
 
+    def removeObjectRef(self, col, obj_uuid):
+        """
+        Remove the ref (or path) of obj_uuid from the db collection group col
+        """
+        del col.attrs[obj_uuid]
+        col_name = col.name.split("/")[-1]
+        self.obj_refs.pop((col_name, obj_uuid), None)
+
     def getDatasetObjByUuid(self, obj_uuid):
-        self.initFile()
         self.log.info("getDatasetObjByUuid(" + obj_uuid + ")")
 
         obj = self.getObjectByUuid("datasets", obj_uuid)
@@ -788,7 +1065,6 @@ class Hdf5db:
         return obj
 
     def getGroupObjByUuid(self, obj_uuid):
-        self.initFile()
         self.log.info("getGroupObjByUuid(" + obj_uuid + ")")
 
         obj = self.getObjectByUuid("groups", obj_uuid)
@@ -809,63 +1085,48 @@ class Hdf5db:
         """
         getNullReference - return a null object reference
         """
-        tmpGrp = None
-        if "{tmp}" not in self.dbGrp:
-            tmpGrp = self.dbGrp.create_group("{tmp}")
-        else:
-            tmpGrp = self.dbGrp["{tmp}"]
+        if self.null_ref is not None:
+            return self.null_ref
+        tmpGrp = self.getTmpGroup()
         if "nullref" not in tmpGrp:
-            dt = h5py.special_dtype(ref=h5py.Reference)
-            tmpGrp.create_dataset("nullref", (1,), dtype=dt)
+            tmpGrp.create_dataset("nullref", (1,), dtype=REF_DTYPE)
         nullref_dset = tmpGrp["nullref"]
-        return nullref_dset[0]
+        self.null_ref = nullref_dset[0]
+        return self.null_ref
 
     def getNullRegionReference(self):
         """
         getNullRegionReference - return a null region reference
         """
-        tmpGrp = None
-        if "{tmp}" not in self.dbGrp:
-            tmpGrp = self.dbGrp.create_group("{tmp}")
-        else:
-            tmpGrp = self.dbGrp["{tmp}"]
-            if "nullregref" not in tmpGrp:
-                dt = h5py.special_dtype(ref=h5py.RegionReference)
-                tmpGrp.create_dataset("nullregref", (1,), dtype=dt)
-                nullregref_dset = tmpGrp["nullregref"]
-                return nullregref_dset[0]
+        if self.null_regref is not None:
+            return self.null_regref
+        tmpGrp = self.getTmpGroup()
+        if "nullregref" not in tmpGrp:
+            tmpGrp.create_dataset("nullregref", (1,), dtype=REGREF_DTYPE)
+        nullregref_dset = tmpGrp["nullregref"]
+        self.null_regref = nullregref_dset[0]
+        return self.null_regref
 
     def getShapeItemByDsetObj(self, obj):
         item = {}
-        if obj.shape is None:
-            # new with h5py 2.6, null space datasets will return None for shape
+        # get the dataspace class from the library, rather than reading the
+        # dataset to tell a null space from a scalar one
+        space = obj.id.get_space()
+        space_type = space.get_simple_extent_type()
+        if space_type == h5py.h5s.NULL:
             item["class"] = "H5S_NULL"
-        elif len(obj.shape) == 0:
-            # check to see if this is a null space vs a scalar dataset we'll do
-            # this by seeing if an exception is raised when reading the dataset
-            # h5py issue https://github.com/h5py/h5py/issues/279 will provide a
-            # better way to determine null spaces
-            # Update 3/10/17: Above issue is closed, but waiting on 2.7 final release
-            try:
-                val = obj[...]
-                if val is None:
-                    self.log.warning("no value returned for scalar dataset")
-                item["class"] = "H5S_SCALAR"
-            except IOError:
-                item["class"] = "H5S_NULL"
+        elif space_type == h5py.h5s.SCALAR:
+            item["class"] = "H5S_SCALAR"
         else:
             item["class"] = "H5S_SIMPLE"
-            item["dims"] = obj.shape
+            item["dims"] = space.shape
             maxshape = []
             include_maxdims = False
-            for i in range(len(obj.shape)):
-                extent = 0
-                if len(obj.maxshape) > i:
-                    extent = obj.maxshape[i]
-                    if extent is None:
-                        extent = 0
-                    if extent > obj.shape[i] or extent == 0:
-                        include_maxdims = True
+            for dim, extent in zip(space.shape, space.get_simple_extent_dims(True)):
+                if extent == h5py.h5s.UNLIMITED:
+                    extent = 0
+                if extent > dim or extent == 0:
+                    include_maxdims = True
                 maxshape.append(extent)
             if include_maxdims:
                 item["maxdims"] = maxshape
@@ -873,23 +1134,43 @@ class Hdf5db:
 
     def getShapeItemByAttrObj(self, obj):
         item = {}
-        if obj.shape is None or obj.get_storage_size() == 0:
+        shape = obj.shape
+        if shape is None or 0 in shape:
             # If storage size is 0, assume this is a null space obj
             # See: h5py issue https://github.com/h5py/h5py/issues/279
+            # Only a zero extent has no storage, so there is no need to ask
+            # for the storage size (which fails for empty attributes anyway)
             item["class"] = "H5S_NULL"
+        elif shape:
+            item["class"] = "H5S_SIMPLE"
+            item["dims"] = shape
         else:
-            if obj.shape:
-                item["class"] = "H5S_SIMPLE"
-                item["dims"] = obj.shape
-            else:
-                item["class"] = "H5S_SCALAR"
+            item["class"] = "H5S_SCALAR"
         return item
 
     #
     # Get dataset creation properties maintained by HDF5 library
     #
-    def getHDF5DatasetCreationProperties(self, obj_uuid, type_class):
-        dset = self.getDatasetObjByUuid(obj_uuid)
+    def getHDF5DatasetCreationProperties(self, obj_uuid, type_class, dset=None):
+        """
+        Return the creation properties of the dataset as reported by the
+        library.  These can't change once the dataset is created, so they are
+        only read once per dataset.  dset can be passed in if the caller
+        already has the dataset open.
+        """
+        creationProps = self.hdf5_creation_props.get(obj_uuid)
+        if creationProps is None:
+            creationProps = self.readHDF5DatasetCreationProperties(
+                obj_uuid, type_class, dset=dset
+            )
+            self.hdf5_creation_props[obj_uuid] = creationProps
+        # callers may add or replace top-level keys (e.g. "layout"), but the
+        # nested layout and filter items are shared and must not be modified
+        return {**creationProps}
+
+    def readHDF5DatasetCreationProperties(self, obj_uuid, type_class, dset=None):
+        if dset is None:
+            dset = self.getDatasetObjByUuid(obj_uuid)
         #
         # Fill in creation properties
         #
@@ -898,25 +1179,15 @@ class Hdf5db:
 
         # alloc time
         nAllocTime = plist.get_alloc_time()
-        if nAllocTime == h5py.h5d.ALLOC_TIME_DEFAULT:
-            creationProps["allocTime"] = "H5D_ALLOC_TIME_DEFAULT"
-        elif nAllocTime == h5py.h5d.ALLOC_TIME_LATE:
-            creationProps["allocTime"] = "H5D_ALLOC_TIME_LATE"
-        elif nAllocTime == h5py.h5d.ALLOC_TIME_EARLY:
-            creationProps["allocTime"] = "H5D_ALLOC_TIME_EARLY"
-        elif nAllocTime == h5py.h5d.ALLOC_TIME_INCR:
-            creationProps["allocTime"] = "H5D_ALLOC_TIME_INCR"
+        if nAllocTime in _ALLOC_TIMES:
+            creationProps["allocTime"] = _ALLOC_TIMES[nAllocTime]
         else:
             self.log.warning("Unknown alloc time value: " + str(nAllocTime))
 
         # fill time
         nFillTime = plist.get_fill_time()
-        if nFillTime == h5py.h5d.FILL_TIME_ALLOC:
-            creationProps["fillTime"] = "H5D_FILL_TIME_ALLOC"
-        elif nFillTime == h5py.h5d.FILL_TIME_NEVER:
-            creationProps["fillTime"] = "H5D_FILL_TIME_NEVER"
-        elif nFillTime == h5py.h5d.FILL_TIME_IFSET:
-            creationProps["fillTime"] = "H5D_FILL_TIME_IFSET"
+        if nFillTime in _FILL_TIMES:
+            creationProps["fillTime"] = _FILL_TIMES[nFillTime]
         else:
             self.log.warning("unknown fill time value: " + str(nFillTime))
 
@@ -926,12 +1197,10 @@ class Hdf5db:
 
         # layout
         nLayout = plist.get_layout()
-        if nLayout == h5py.h5d.COMPACT:
-            creationProps["layout"] = {"class": "H5D_COMPACT"}
-        elif nLayout == h5py.h5d.CONTIGUOUS:
-            creationProps["layout"] = {"class": "H5D_CONTIGUOUS"}
-        elif nLayout == h5py.h5d.CHUNKED:
-            creationProps["layout"] = {"class": "H5D_CHUNKED", "dims": dset.chunks}
+        if nLayout in _LAYOUT_CLASSES:
+            creationProps["layout"] = {"class": _LAYOUT_CLASSES[nLayout]}
+            if nLayout == h5py.h5d.CHUNKED:
+                creationProps["layout"]["dims"] = plist.get_chunk()
         else:
             self.log.warning("Unknown layout value:" + str(nLayout))
 
@@ -946,25 +1215,12 @@ class Hdf5db:
                 filter_prop["id"] = filter_id
                 if filter_info[3]:
                     filter_prop["name"] = self.bytesArrayToList(filter_info[3])
-                if filter_id in _HDF_FILTERS:
-                    hdf_filter = _HDF_FILTERS[filter_id]
-                    filter_prop["class"] = hdf_filter["class"]
-                    if "options" in hdf_filter:
-                        filter_opts = hdf_filter["options"]
-                        for i in range(len(filter_opts)):
-                            if len(opt_values) <= i:
-                                break  # end of option values
-                            opt_value = opt_values[i]
-                            opt_value_enum = None
-                            option_name = filter_opts[i]
-                            if option_name in _HDF_FILTER_OPTION_ENUMS:
-                                option_enums = _HDF_FILTER_OPTION_ENUMS[option_name]
-                                if opt_value in option_enums:
-                                    opt_value_enum = option_enums[opt_value]
-                            if opt_value_enum:
-                                filter_prop[option_name] = opt_value_enum
-                            else:
-                                filter_prop[option_name] = opt_value
+                if filter_id in _HDF_FILTER_CLASSES:
+                    filter_prop["class"] = _HDF_FILTER_CLASSES[filter_id]
+                    filter_opts = _HDF_FILTER_OPTIONS.get(filter_id, ())
+                    # zip stops at the end of the option values
+                    for (option_name, enums), opt_value in zip(filter_opts, opt_values):
+                        filter_prop[option_name] = enums.get(opt_value, opt_value)
                 else:
                     # custom filter
                     filter_prop["class"] = "H5Z_FILTER_USER"
@@ -981,7 +1237,7 @@ class Hdf5db:
     def getDatasetItemByUuid(self, obj_uuid):
         dset = self.getDatasetObjByUuid(obj_uuid)
         if dset is None:
-            if self.getModifiedTime(obj_uuid, useRoot=False):
+            if self.isDeleted(obj_uuid):
                 msg = "Dataset with uuid: " + obj_uuid + " has been previously deleted"
                 self.log.info(msg)
                 raise IOError(errno.ENOENT, msg)
@@ -998,18 +1254,14 @@ class Hdf5db:
             alias.append(dset.name)  # just use the default h5py path for now
         item["alias"] = alias
 
-        item["attributeCount"] = len(dset.attrs)
+        # the object header has the count, no need to iterate the attributes
+        item["attributeCount"] = h5py.h5o.get_info(dset.id).num_attrs
 
         # check if the dataset is using a committed type
         typeid = h5py.h5d.DatasetID.get_type(dset.id)
         typeItem = None
         if h5py.h5t.TypeID.committed(typeid):
-            type_uuid = None
-            addr = h5py.h5o.get_info(typeid).addr
-            type_uuid = self.getUUIDByAddress(addr)
-            committedType = self.getCommittedTypeItemByUuid(type_uuid)
-            typeItem = committedType["type"]
-            typeItem["uuid"] = type_uuid
+            typeItem = self.getCommittedTypeItemByTypeId(typeid)
         else:
             typeItem = getTypeItem(dset.dtype)
 
@@ -1026,12 +1278,14 @@ class Hdf5db:
         if creationProps:
             # if chunks is not in the db props, add it from the dataset prop
             # (so auto-chunk values can be returned)
-            if dset.chunks and "layout" not in creationProps:
-                creationProps["layout"] = {"class": "H5D_CHUNKED", "dims": dset.chunks}
+            if "layout" not in creationProps:
+                chunks = dset.chunks
+                if chunks:
+                    creationProps["layout"] = {"class": "H5D_CHUNKED", "dims": chunks}
         else:
             # no db-tracked creation properties, pull properties from library
             creationProps = self.getHDF5DatasetCreationProperties(
-                obj_uuid, typeItem["class"]
+                obj_uuid, typeItem["class"], dset=dset
             )
 
         if creationProps:
@@ -1039,6 +1293,41 @@ class Hdf5db:
 
         return item
 
+    def getDatasetTypeItem(self, obj_uuid, dset):
+        """
+        Return the type item and item size for the type of the dataset.  The
+        type of a dataset can't change, so these are only worked out once.
+        """
+        entry = self.dataset_types.get(obj_uuid)
+        if entry is None:
+            typeItem = getTypeItem(dset.dtype)
+            entry = (typeItem, getItemSize(typeItem))
+            self.dataset_types[obj_uuid] = entry
+        return entry
+
+    def getDatasetOffsetByUuid(self, obj_uuid):
+        """
+        Return the file offset of the dataset's data (for chunked datasets, of
+        its first chunk).  Returns None if the data has not been allocated or
+        is not stored at a single location in the file (e.g. compact layout).
+        """
+        dset = self.getDatasetObjByUuid(obj_uuid)
+        if dset is None:
+            msg = "Dataset with uuid: " + obj_uuid + " was not found"
+            self.log.info(msg)
+            raise IOError(errno.ENXIO, msg)
+        if dset.chunks is None:
+            return dset.id.get_offset()
+        try:
+            if hasattr(dset.id, "chunk_iter"):
+                # stop at the first chunk, get_chunk_info may visit all of
+                # them in some library versions
+                return dset.id.chunk_iter(lambda info: info.byte_offset)
+            return dset.id.get_chunk_info(0).byte_offset
+        except (AttributeError, RuntimeError, ValueError):
+            # no chunks written or HDF5 library before 1.10.5
+            return None
+
     def createTypeFromItem(self, attr_type):
         """
         createTypeFromItem - create type given dictionary definition
@@ -1080,12 +1369,11 @@ class Hdf5db:
         Returns item
         """
         self.log.info("createCommittedType")
-        self.initFile()
         if self.readonly:
             msg = "Can't create committed type (updates are not allowed)"
             self.log.info(msg)
             raise IOError(errno.EPERM, msg)
-        datatypes = self.dbGrp["{datatypes}"]
+        datatypes = self.getDbGroup("{datatypes}")
         if not obj_uuid:
             obj_uuid = str(uuid.uuid1())
         dt = self.createTypeFromItem(datatype)
@@ -1097,10 +1385,9 @@ class Hdf5db:
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
         newType = datatypes[obj_uuid]  # this will be a h5py Datatype class
-        # store reverse map as an attribute
+        # store reverse map
         addr = h5py.h5o.get_info(newType.id).addr
-        addrGrp = self.dbGrp["{addr}"]
-        addrGrp.attrs[str(addr)] = obj_uuid
+        self.setUUIDByAddress(addr, obj_uuid)
         # set timestamp
         now = time.time()
         self.setCreateTime(obj_uuid, timestamp=now)
@@ -1119,32 +1406,40 @@ class Hdf5db:
         Returns type obj
         """
         self.log.info("getCommittedTypeObjByUuid(" + obj_uuid + ")")
-        self.initFile()
-        datatype = None
-        datatypesGrp = self.dbGrp["{datatypes}"]
-        if obj_uuid in datatypesGrp.attrs:
-            typeRef = datatypesGrp.attrs[obj_uuid]
-            # typeRef could be a reference or (for read-only) a path
-            datatype = self.f[typeRef]
-        elif obj_uuid in datatypesGrp:
-            datatype = datatypesGrp[obj_uuid]  # non-linked type
-        else:
+        datatype = self.getObjectByUuid("datatypes", obj_uuid)
+        if datatype is None:
             msg = "Committed datatype: " + obj_uuid + " not found"
             self.log.info(msg)
 
         return datatype
 
+    def getCommittedTypeItemByTypeId(self, typeid):
+        """
+        Return the type item (including the uuid) of the committed type that
+        the dataset or attribute type typeid refers to.  The items are kept
+        by address, since all the objects using a committed type share it.
+        """
+        addr = h5py.h5o.get_info(typeid).addr
+        typeItem = self.committed_types.get(addr)
+        if typeItem is None:
+            type_uuid = self.getUUIDByAddress(addr)
+            committedType = self.getCommittedTypeItemByUuid(type_uuid)
+            typeItem = committedType["type"]
+            typeItem["uuid"] = type_uuid
+            self.committed_types[addr] = typeItem
+        # return a copy since the caller may update it
+        return copy.deepcopy(typeItem)
+
     def getCommittedTypeItemByUuid(self, obj_uuid):
         """
         getCommittedTypeItemByUuid - get json from {datatypes} collection
         Returns type obj
         """
         self.log.info("getCommittedTypeItemByUuid(" + obj_uuid + ")")
-        self.initFile()
         datatype = self.getCommittedTypeObjByUuid(obj_uuid)
 
         if datatype is None:
-            if self.getModifiedTime(obj_uuid, useRoot=False):
+            if self.isDeleted(obj_uuid):
                 msg = "Datatype with uuid: " + obj_uuid + " has been previously deleted"
                 self.log.info(msg)
                 raise IOError(errno.ENOENT, msg)
@@ -1159,7 +1454,14 @@ class Hdf5db:
             alias.append(datatype.name)  # just use the default h5py path for now
         item["alias"] = alias
         item["attributeCount"] = len(datatype.attrs)
-        item["type"] = getTypeItem(datatype.dtype)
+        # the type of a committed datatype never changes, so keep its json.
+        # Callers only set top-level keys (e.g. "uuid" in
+        # getCommittedTypeItemByTypeId), so a shallow copy is enough
+        typeItem = self.committed_type_items.get(obj_uuid)
+        if typeItem is None:
+            typeItem = getTypeItem(datatype.dtype)
+            self.committed_type_items[obj_uuid] = typeItem
+        item["type"] = {**typeItem}
         if self.update_timestamps:
             item["ctime"] = self.getCreateTime(obj_uuid)
             item["mtime"] = self.getModifiedTime(obj_uuid)
@@ -1171,13 +1473,21 @@ class Hdf5db:
         Get attribute given an object and name
         returns: JSON object
         """
-        if name not in obj.attrs:
+        b_name = name.encode("utf-8")
+        if not h5py.h5a.exists(obj.id, b_name):
             msg = "Attribute: [" + name + "] not found in object: " + obj.name
             self.log.info(msg)
             return None
 
         # get the attribute!
-        attrObj = h5py.h5a.open(obj.id, np.bytes_(name))
+        attrObj = h5py.h5a.open(obj.id, b_name)
+        return self.getAttributeItemByAttrObj(obj, attrObj, name, includeData)
+
+    def getAttributeItemByAttrObj(self, obj, attrObj, name, includeData=True):
+        """
+        Get attribute given an object and an attribute that has been opened
+        returns: JSON object
+        """
         attr = None
 
         item = {"name": name}
@@ -1186,12 +1496,7 @@ class Hdf5db:
         typeid = attrObj.get_type()
         typeItem = None
         if h5py.h5t.TypeID.committed(typeid):
-            type_uuid = None
-            addr = h5py.h5o.get_info(typeid).addr
-            type_uuid = self.getUUIDByAddress(addr)
-            committedType = self.getCommittedTypeItemByUuid(type_uuid)
-            typeItem = committedType["type"]
-            typeItem["uuid"] = type_uuid
+            typeItem = self.getCommittedTypeItemByTypeId(typeid)
         else:
             typeItem = getTypeItem(attrObj.dtype)
         item["type"] = typeItem
@@ -1205,7 +1510,11 @@ class Hdf5db:
         item["shape"] = shape_json
         if shape_json["class"] == "H5S_NULL":
             includeData = False
-        if includeData:
+        if includeData and typeItem["class"] in _NUMERIC_CLASSES:
+            # read simple numeric types directly from the open attribute
+            attr = np.empty(attrObj.shape, dtype=attrObj.dtype)
+            attrObj.read(attr)
+        elif includeData:
             try:
                 attr = obj.attrs[name]  # returns a numpy array
             except TypeError:
@@ -1225,33 +1534,73 @@ class Hdf5db:
         # timestamps will be added by getAttributeItem()
         return item
 
-    def getAttributeItems(self, col_type, obj_uuid, marker=None, limit=0):
+    def getAttributeItems(
+        self, col_type, obj_uuid, marker=None, limit=0, includeData=False
+    ):
         self.log.info("db.getAttributeItems(" + obj_uuid + ")")
         if marker:
             self.log.info("...marker: " + marker)
         if limit:
             self.log.info("...limit: " + str(limit))
 
-        self.initFile()
         obj = self.getObjectByUuid(col_type, obj_uuid)
         if obj is None:
             msg = "Object: " + obj_uuid + " could not be loaded"
             self.log.info(msg)
             raise IOError(errno.ENXIO, msg)
 
-        items = []
-        gotMarker = True
+        return self.getAttributeItemsByObj(
+            obj, obj_uuid, marker=marker, limit=limit, includeData=includeData
+        )
+
+    def getAttributeNames(self, obj, obj_uuid):
+        """
+        Get the attribute names of an object, in the same order as obj.attrs
+        returns: the h5py index type and the list of names
+        """
+        entry = self.attr_names.get(obj_uuid)
+        if entry is None:
+            names = []
+            index_type = h5py.h5.INDEX_NAME
+            plist = obj.id.get_create_plist()
+            if plist.get_attr_creation_order() & h5py.h5p.CRT_ORDER_TRACKED:
+                index_type = h5py.h5.INDEX_CRT_ORDER
+
+            def addName(name):
+                names.append(name.decode("utf-8"))
+
+            h5py.h5a.iterate(obj.id, addName, index_type=index_type)
+            entry = (index_type, names)
+            self.attr_names[obj_uuid] = entry
+        return entry
+
+    def getAttributeItemsByObj(
+        self, obj, obj_uuid, marker=None, limit=0, includeData=False
+    ):
+        """
+        Same as getAttributeItems, for an object that has already been opened
+        """
+        index_type, names = self.getAttributeNames(obj, obj_uuid)
+        start = 0
         if marker is not None:
-            gotMarker = False
-        count = 0
-        for name in obj.attrs:
-            if not gotMarker:
-                if name == marker:
-                    gotMarker = True
-                    continue  # start filling in result on next pass
-                else:
-                    continue  # keep going!
-            item = self.getAttributeItemByObj(obj, name, False)
+            if marker not in names:
+                return []
+            start = names.index(marker) + 1  # start after the marker
+        stop = len(names)
+        if limit > 0:
+            stop = min(start + limit, stop)
+
+        if self.update_timestamps and stop - start > 1:
+            # get the timestamps for all the attributes at once
+            self.loadTimeStamps("{ctime}")
+            self.loadTimeStamps("{mtime}")
+
+        items = []
+        for index in range(start, stop):
+            name = names[index]
+            # open by position to save a lookup by name
+            attrObj = h5py.h5a.open(obj.id, index=index, index_type=index_type)
+            item = self.getAttributeItemByAttrObj(obj, attrObj, name, includeData)
             # mix-in timestamps
             if self.update_timestamps:
                 item["ctime"] = self.getCreateTime(
@@ -1262,16 +1611,12 @@ class Hdf5db:
                 )
 
             items.append(item)
-            count += 1
-            if limit > 0 and count == limit:
-                break  # return what we got
         return items
 
     def getAttributeItem(self, col_type, obj_uuid, name):
         self.log.info(
             "getAttributeItemByUuid(" + col_type + ", " + obj_uuid + ", " + name + ")"
         )
-        self.initFile()
         obj = self.getObjectByUuid(col_type, obj_uuid)
         if obj is None:
             msg = "Parent object: " + obj_uuid + " of attribute not found"
@@ -1280,9 +1625,7 @@ class Hdf5db:
             return None
         item = self.getAttributeItemByObj(obj, name)
         if item is None:
-            if self.getModifiedTime(
-                obj_uuid, objType="attribute", name=name, useRoot=False
-            ):
+            if self.isDeleted(obj_uuid, objType="attribute", name=name):
                 # attribute has been removed
                 msg = (
                     "Attribute: ["
@@ -1389,7 +1732,7 @@ class Hdf5db:
         if isinstance(attr_name, str):
             try:
                 attr_name = attr_name.encode("ascii")
-            except UnicodeDecodeError:
+            except UnicodeEncodeError:
                 raise TypeError("non-ascii attribute name not allowed")
 
         # create the attribute
@@ -1422,13 +1765,10 @@ class Hdf5db:
             # See: https://github.com/h5py/h5py/issues/279
             # work around this by using low-level interface.
             # first create a temp scalar dataset so we can pull out the typeid
-            tmpGrp = None
-            if "{tmp}" not in self.dbGrp:
-                tmpGrp = self.dbGrp.create_group("{tmp}")
-            else:
-                tmpGrp = self.dbGrp["{tmp}"]
-            tmpGrp.attrs.create(attr_name, 0, shape=(), dtype=dt)
+            tmpGrp = self.getTmpGroup()
+            # encode the name once for the low-level calls below
             b_attr_name = attr_name.encode("utf-8")
+            tmpGrp.attrs.create(b_attr_name, 0, shape=(), dtype=dt)
             tmpAttr = h5py.h5a.open(tmpGrp.id, name=b_attr_name)
             if not tmpAttr:
                 msg = "Unexpected error creating datatype for nullspace attribute"
@@ -1437,12 +1777,12 @@ class Hdf5db:
             tid = tmpAttr.get_type()
             sid = sid = h5py.h5s.create(h5py.h5s.NULL)
             # now create the permanent attribute
-            if attr_name in obj.attrs:
+            if h5py.h5a.exists(obj.id, b_attr_name):
                 self.log.info("deleting attribute: " + attr_name)
-                del obj.attrs[attr_name]
+                h5py.h5a.delete(obj.id, b_attr_name)
             attr_id = h5py.h5a.create(obj.id, b_attr_name, tid, sid)
             # delete the temp attribute
-            del tmpGrp.attrs[attr_name]
+            h5py.h5a.delete(tmpGrp.id, b_attr_name)
             if not attr_id:
                 msg = "Unexpected error creating nullspace attribute"
                 self.log.error(msg)
@@ -1476,15 +1816,23 @@ class Hdf5db:
                     self.makeNullTermStringAttribute(obj, attr_name, strLength, value)
                 else:
                     typeItem = getTypeItem(dt)
-                    value = self.toRef(rank, typeItem, value)
+                    npdata = None
+                    if rank > 0 and typeItem["class"] in _NUMERIC_CLASSES:
+                        # convert numeric values in one call
+                        npdata = np.asarray(value, dtype=dt)
+                        if npdata.shape != shape:
+                            npdata = None  # let toNumPyArray sort it out
 
-                    # create numpy array
-                    npdata = np.zeros(shape, dtype=dt)
+                    if npdata is None:
+                        value = self.toRef(rank, typeItem, value)
 
-                    if rank == 0:
-                        npdata[()] = self.toNumPyValue(attr_type, value, npdata[()])
-                    else:
-                        self.toNumPyArray(rank, attr_type, value, npdata)
+                        # create numpy array
+                        npdata = np.zeros(shape, dtype=dt)
+
+                        if rank == 0:
+                            npdata[()] = self.toNumPyValue(attr_type, value, npdata[()])
+                        else:
+                            self.toNumPyArray(rank, attr_type, value, npdata)
 
                     self.writeNdArrayToAttribute(
                         obj.attrs, attr_name, npdata, shape, dt
@@ -1497,7 +1845,6 @@ class Hdf5db:
     def createAttribute(self, col_name, obj_uuid, attr_name, shape, attr_type, value):
         self.log.info("createAttribute: [" + attr_name + "]")
 
-        self.initFile()
         if self.readonly:
             msg = "Unable to create attribute (updates are not allowed)"
             self.log.info(msg)
@@ -1514,6 +1861,8 @@ class Hdf5db:
             pass  # Skip since reference list will be created by attach scale
         else:
             self.makeAttribute(obj, attr_name, shape, attr_type, value)
+        # attaching scales updates the attributes of other objects as well
+        self.attr_names.clear()
 
         now = time.time()
         self.setCreateTime(obj_uuid, objType="attribute", name=attr_name, timestamp=now)
@@ -1523,7 +1872,6 @@ class Hdf5db:
         self.setModifiedTime(obj_uuid, timestamp=now)  # owner entity is modified
 
     def deleteAttribute(self, col_name, obj_uuid, attr_name):
-        self.initFile()
         if self.readonly:
             msg = "Unable to delete attribute (updates are not allowed)"
             self.log.info(msg)
@@ -1542,10 +1890,8 @@ class Hdf5db:
             raise IOError(errno.ENXIO, msg)
 
         del obj.attrs[attr_name]
-        now = time.time()
-        self.setModifiedTime(
-            obj_uuid, objType="attribute", name=attr_name, timestamp=now
-        )
+        self.attr_names.pop(obj_uuid, None)
+        self.setDeleted(obj_uuid, objType="attribute", name=attr_name)
 
         return True
 
@@ -1573,70 +1919,83 @@ class Hdf5db:
                 out.append(item_value)
             return out  # done for array case
 
-        out = None
         typeClass = typeItem["class"]
         if isinstance(value, (np.ndarray, np.generic)):
             value = value.tolist()  # convert numpy object to list
-        if typeClass == "H5T_COMPOUND":
-            if type(value) not in (list, tuple):
-                msg = "Unexpected type for compound value"
-                self.log.error(msg)
-                raise IOError(errno.EIO, msg)
+        getter = self.data_value_getters.get(typeClass)
+        if getter is None:
+            msg = "Unexpected type class: " + typeClass
+            self.log.info(msg)
+            raise IOError(errno.EINVAL, msg)
+        return getter(typeItem, value)
 
-            fields = typeItem["fields"]
-            if len(fields) != len(value):
-                msg = "Number of elements in compound type does not match type"
-                self.log.error(msg)
-                raise IOError(errno.EIO, msg)
-            nFields = len(fields)
-            out = []
-            for i in range(nFields):
-                field = fields[i]
-                item_value = self.getDataValue(field["type"], value[i])
-                out.append(item_value)
-        elif typeClass == "H5T_VLEN":
-            if type(value) not in (list, tuple):
-                msg = "Unexpected type for vlen value"
-                self.log.error(msg)
-                raise IOError(errno.EIO, msg)
+    def getCompoundDataValue(self, typeItem, value):
+        if type(value) not in (list, tuple):
+            msg = "Unexpected type for compound value"
+            self.log.error(msg)
+            raise IOError(errno.EIO, msg)
 
-            baseType = typeItem["base"]
-            out = []
-            nElements = len(value)
-            for i in range(nElements):
-                item_value = self.getDataValue(baseType, value[i])
-                out.append(item_value)
-        elif typeClass == "H5T_REFERENCE":
-            out = self.refToList(value)
-        elif typeClass == "H5T_OPAQUE":
-            out = "???"  # todo
-        elif typeClass == "H5T_ARRAY":
-            type_dims = typeItem["dims"]
-            if type(type_dims) not in (list, tuple):
-                msg = "unexpected type for type array dimensions"
-                self.log.error(msg)
-                raise IOError(errno.EIO, msg)
-            rank = len(type_dims)
-            baseType = typeItem["base"]
-            out = self.getDataValue(baseType, value, dimension=rank, dims=type_dims)
+        fields = typeItem["fields"]
+        if len(fields) != len(value):
+            msg = "Number of elements in compound type does not match type"
+            self.log.error(msg)
+            raise IOError(errno.EIO, msg)
+        nFields = len(fields)
+        out = []
+        for i in range(nFields):
+            field = fields[i]
+            item_value = self.getDataValue(field["type"], value[i])
+            out.append(item_value)
+        return out
 
-        elif typeClass in ("H5T_INTEGER", "H5T_FLOAT", "H5T_ENUM"):
-            out = value  # just copy value
-        elif typeClass == "H5T_STRING":
-            if "charSet" in typeItem:
-                charSet = typeItem["charSet"]
-            else:
-                charSet = "H5T_CSET_ASCII"
-            if charSet == "H5T_CSET_ASCII" and isinstance(value, bytes):
-                out = value.decode("utf-8")
-            else:
-                out = value
-        else:
-            msg = "Unexpected type class: " + typeClass
-            self.log.info(msg)
-            raise IOError(errno.ENINVAL, msg)
+    def getVlenDataValue(self, typeItem, value):
+        if type(value) not in (list, tuple):
+            msg = "Unexpected type for vlen value"
+            self.log.error(msg)
+            raise IOError(errno.EIO, msg)
+
+        baseType = typeItem["base"]
+        if baseType["class"] in _NUMERIC_CLASSES:
+            # already converted to a list of numbers by tolist()
+            return list(value)
+        out = []
+        nElements = len(value)
+        for i in range(nElements):
+            item_value = self.getDataValue(baseType, value[i])
+            out.append(item_value)
         return out
 
+    def getReferenceDataValue(self, typeItem, value):
+        return self.refToList(value)
+
+    def getOpaqueDataValue(self, typeItem, value):
+        return "???"  # todo
+
+    def getArrayDataValue(self, typeItem, value):
+        type_dims = typeItem["dims"]
+        if type(type_dims) not in (list, tuple):
+            msg = "unexpected type for type array dimensions"
+            self.log.error(msg)
+            raise IOError(errno.EIO, msg)
+        rank = len(type_dims)
+        baseType = typeItem["base"]
+        if baseType["class"] in _NUMERIC_CLASSES and type(value) is list:
+            # already converted to nested lists of numbers by tolist()
+            return value
+        return self.getDataValue(baseType, value, dimension=rank, dims=type_dims)
+
+    def getNumericDataValue(self, typeItem, value):
+        return value  # just copy value
+
+    def getStringDataValue(self, typeItem, value):
+        # vlen strings are already str, so check for bytes first
+        if (
+            isinstance(value, bytes)
+            and typeItem.get("charSet", "H5T_CSET_ASCII") == "H5T_CSET_ASCII"
+        ):
+            return value.decode("utf-8")
+        return value
+
     def getRefValue(self, typeItem: dict, value: list):
         """
         Return a numpy value based on json representation
@@ -1667,11 +2026,14 @@ class Hdf5db:
                 raise IOError(errno.EIO, msg)
 
             baseType = typeItem["base"]
-            out = []
-            nElements = len(value)
-            for i in range(nElements):
-                item_value = self.getRefValue(baseType, value[i])
-                out.append(item_value)
+            if baseType["class"] in _NUMERIC_CLASSES:
+                out = list(value)  # numbers are used as is
+            else:
+                out = []
+                nElements = len(value)
+                for i in range(nElements):
+                    item_value = self.getRefValue(baseType, value[i])
+                    out.append(item_value)
         elif typeClass == "H5T_REFERENCE":
             out = self.listToRef(value)
         elif typeClass == "H5T_OPAQUE":
@@ -1689,7 +2051,7 @@ class Hdf5db:
         else:
             msg = "Unexpected type class: " + typeClass
             self.log.info(msg)
-            raise IOError(errno.ENINVAL, msg)
+            raise IOError(errno.EINVAL, msg)
 
         if isinstance(out, list):
             out = tuple(out)  # convert to tuple
@@ -1740,19 +2102,14 @@ class Hdf5db:
             if typeItem["charSet"] == "H5T_CSET_UTF8":
                 des = src  # src.encode('utf-8')
             else:
-                if type(src) is str:
-                    try:
-                        src.encode("ascii")
-                    except UnicodeDecodeError:
-                        raise TypeError(
-                            "non-ascii value not allowed with H5T_CSET_ASCII"
-                        )
+                if type(src) is str and not src.isascii():
+                    raise TypeError("non-ascii value not allowed with H5T_CSET_ASCII")
                 des = src
 
         else:
             msg = "Unexpected type class: " + typeClass
             self.log.info(msg)
-            raise IOError(errno.ENINVAL, msg)
+            raise IOError(errno.EINVAL, msg)
         return des
 
     """
@@ -1765,12 +2122,44 @@ class Hdf5db:
             self.log.error(msg)
             raise IOError(errno.EIO, msg)  # shouldn't be called with rank 0
 
+        fields = des.dtype.fields
+        if (
+            fields
+            and rank == des.ndim
+            and all(f[0].kind in _SIMPLE_FIELD_KINDS for f in fields.values())
+        ):
+            # compound of numbers and fixed length strings, toRef has
+            # already made a tuple of each element so convert in one call
+            try:
+                arr = np.asarray(src, dtype=des.dtype)
+            except (TypeError, ValueError):
+                arr = None  # let the element by element copy report it
+            if arr is not None and arr.shape == des.shape:
+                des[...] = arr
+                return
+
+        vlen_dt = None
+        if (
+            rank == 1
+            and isinstance(typeItem, dict)
+            and typeItem["class"] == "H5T_VLEN"
+            and typeItem["base"]["class"] in _NUMERIC_CLASSES
+        ):
+            # numeric vlen, create the base type once rather than per element
+            vlen_dt = self.createTypeFromItem(typeItem["base"])
+
         for i in range(len(des)):
             des_sec = des[i]  # numpy slab
 
             src_sec = src[i]
 
-            if rank > 1:
+            if vlen_dt is not None:
+                if type(src_sec) not in (list, tuple):
+                    msg = "Unexpected type for vlen value"
+                    self.log.error(msg)
+                    raise IOError(errno.EIO, msg)
+                des[i] = np.array(src_sec, dtype=vlen_dt)
+            elif rank > 1:
                 self.toNumPyArray(rank - 1, typeItem, src_sec, des_sec)
             else:
                 rv = self.toNumPyValue(typeItem, src_sec, des_sec)
@@ -1798,30 +2187,86 @@ class Hdf5db:
             # scalar value
             out = self.getRefValue(typeItem, data)
         else:
-            out = []
-            for item in data:
+            # look at the type once rather than for every element
+            convert = self.getRefValueConverter(typeItem)
+
+            def toRefList(rank, data):
                 if rank > 1:
-                    out_item = self.toRef(rank - 1, typeItem, item)
-                    out.append(out_item)
-                else:
-                    out_item = self.getRefValue(typeItem, item)
-                    out.append(out_item)
+                    return [toRefList(rank - 1, item) for item in data]
+                return [convert(item) for item in data]
+
+            out = toRefList(rank, data)
 
         return out
 
+    def getRefValueConverter(self, typeItem):
+        """
+        Return a function doing getRefValue for values of the given type
+        """
+        typeClass = typeItem["class"]
+        if typeClass == "H5T_COMPOUND":
+            converters = [
+                self.getRefValueConverter(f["type"]) for f in typeItem["fields"]
+            ]
+            nFields = len(converters)
+
+            def convert(value):
+                if not isinstance(value, (list, tuple)):
+                    msg = f"Unexpected type for compound value: {type(value)}"
+                    self.log.error(msg)
+                    raise IOError(errno.EIO, msg)
+                if len(value) != nFields:
+                    msg = "Number of elements in compound type does not match type"
+                    self.log.error(msg)
+                    raise IOError(errno.EIO, msg)
+                return tuple([c(v) for c, v in zip(converters, value)])
+
+        elif typeClass in _NUMERIC_CLASSES:
+
+            def convert(value):
+                return tuple(value) if isinstance(value, list) else value
+
+        elif typeClass == "H5T_STRING" and typeItem["charSet"] != "H5T_CSET_UTF8":
+            convert = str.encode
+        else:
+
+            def convert(value):
+                return self.getRefValue(typeItem, value)
+
+        return convert
+
     """
        Convert list to json serializable values.
     """
 
     def toList(self, rank, typeItem, data):
         out = None
-        typeClass = typeItem["class"]
-        if typeClass in ("H5T_INTEGER", "H5T_FLOAT"):
+        valueClass = typeItem["class"]
+        if valueClass == "H5T_ARRAY":
+            # the array dimensions are the inner dimensions of the numpy array
+            valueClass = typeItem["base"]["class"]
+        if valueClass in _NUMERIC_CLASSES and isinstance(data, np.ndarray):
             out = data.tolist()  # just use as is
+        elif (
+            valueClass == "H5T_STRING"
+            and typeItem.get("charSet", "H5T_CSET_ASCII") == "H5T_CSET_ASCII"
+            and isinstance(data, np.ndarray)
+            and data.dtype.kind == "S"
+        ):
+            # decode all the fixed length strings at once
+            out = np.char.decode(data, "utf-8").tolist()
 
         elif rank == 0:
             # scalar value
             out = self.getDataValue(typeItem, data)
+        elif isinstance(data, np.ndarray) and 0 not in data.shape[:rank]:
+            # convert the elements in one pass over the flattened array,
+            # then split the result back up into the outer dimensions
+            dims = data.shape[:rank]
+            values = data.reshape((-1,) + data.shape[rank:]).tolist()
+            out = [self.getDataValue(typeItem, value) for value in values]
+            for extent in reversed(dims[1:]):
+                out = [out[i : i + extent] for i in range(0, len(out), extent)]
         else:
             out = []
             for item in data:
@@ -1860,13 +2305,17 @@ class Hdf5db:
        Create ascii representation of ref data object
     """
 
-    def refToList(self, data):
+    def refToList(self, data, refs=None):
         # todo - verify that data is a numpy.ndarray
+        if refs is None:
+            refs = {}  # address to json value, objects get referenced many times
         out = None
         if type(data) is h5py.h5r.Reference:
             if bool(data):
-                grpref = self.f[data]
-                addr = h5py.h5o.get_info(grpref.id).addr
+                objid = h5py.h5r.dereference(data, self.f.id)
+                addr = h5py.h5o.get_info(objid).addr
+                if addr in refs:
+                    return refs[addr]
                 uuid = self.getUUIDByAddress(addr)
                 if self.getGroupObjByUuid(uuid):
                     out = "groups/" + uuid
@@ -1876,7 +2325,8 @@ class Hdf5db:
                     out = "datatypes/" + uuid
                 else:
                     self.log.warning("uuid in region ref not found: [" + uuid + "]")
-                    return None
+                    out = None
+                refs[addr] = out
             else:
                 out = "null"
         elif type(data) is h5py.h5r.RegionReference:
@@ -1884,7 +2334,7 @@ class Hdf5db:
         else:
             out = []
             for item in data:
-                out.append(self.refToList(item))  # recursive call
+                out.append(self.refToList(item, refs))  # recursive call
         return out
 
     """
@@ -1924,8 +2374,16 @@ class Hdf5db:
 
         elif isinstance(data, (list, tuple)):
             out = []
+            refs = {}  # the same object tends to be referenced many times
             for item in data:
-                out.append(self.listToRef(item))  # recursive call
+                if item and isinstance(item, str):
+                    ref = refs.get(item)
+                    if ref is None:
+                        ref = self.listToRef(item)
+                        refs[item] = ref
+                    out.append(ref)
+                else:
+                    out.append(self.listToRef(item))  # recursive call
         elif isinstance(data, dict):
             # assume region ref
             out = self.createRegionReference(data)
@@ -1939,6 +2397,18 @@ class Hdf5db:
         """
         Convert list that may contain bytes type elements to list of string elements
         """
+        if isinstance(data, np.ndarray):
+            kind = data.dtype.kind
+            if kind in "biuf":
+                return data.tolist()  # no bytes in here
+            if kind == "S":
+                # decode all the strings at once
+                return np.char.decode(data, "utf-8").tolist()
+            if len(data.shape) > 0:
+                # convert to python objects in one call, then decode
+                # any bytes in the result
+                return self.decodeBytes(data.tolist())
+
         if isinstance(data, (bytes, str)):
             is_list = False
         elif isinstance(data, (np.ndarray, np.generic)):
@@ -1967,6 +2437,19 @@ class Hdf5db:
 
         return out
 
+    def decodeBytes(self, value):
+        """
+        Decode the bytes in a value returned by ndarray.tolist(), with any
+        lists or tuples converted to lists
+        """
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        if isinstance(value, (list, tuple)):
+            return [self.decodeBytes(item) for item in value]
+        if isinstance(value, (np.ndarray, np.generic)):
+            return self.bytesArrayToList(value)  # e.g. vlen data
+        return value
+
     def getRegionReference(self, regionRef):
         """
         Get item description of region reference value
@@ -2084,51 +2567,73 @@ class Hdf5db:
             h5py.h5s.SpaceID.select_elements(space_id, selection)
         elif select_type == "H5S_SEL_HYPERSLABS":
             selection = item["selection"]
-
-            for slab in selection:
-                # each item should be a two element array defining the hyperslab boundary
-                if len(slab) != 2:
-                    msg = "selection value not valid (not a 2 element array)"
-                    self.log.info(msg)
-                    raise IOError(errno.EINVAL, msg)
-                start = slab[0]
-                if isinstance(start, list):
-                    start = tuple(start)
-                if type(start) is not tuple or len(start) != rank:
-                    msg = "selection value not valid, start element should have number "
-                    msg += "elements equal to rank of referenced dataset"
+            try:
+                slabs = np.asarray(selection)
+            except ValueError:
+                slabs = None  # ragged, the per slab checks will say why
+            if (
+                slabs is not None
+                and slabs.dtype.kind in "iu"
+                and slabs.shape[1:] == (2, rank)
+            ):
+                # check all the slabs at once
+                starts = slabs[:, 0]
+                counts = slabs[:, 1] - starts
+                if (starts < 0).any():
+                    msg = "start value for hyperslab selection must be non-negative"
                     self.log.info(msg)
                     raise IOError(errno.EINVAL, msg)
-                stop = slab[1]
-                if isinstance(stop, list):
-                    stop = tuple(stop)
-                if type(stop) is not tuple or len(stop) != rank:
-                    msg = "selection value not valid, count element should have number "
-                    msg += "elements equal to rank of referenced dataset"
+                if (counts <= 0).any():
+                    msg = "stop value must be greater than start value for hyperslab selection"
                     self.log.info(msg)
                     raise IOError(errno.EINVAL, msg)
-                count = []
-                for i in range(rank):
-                    if start[i] < 0:
-                        msg = "start value for hyperslab selection must be non-negative"
+                for start, count in zip(starts.tolist(), counts.tolist()):
+                    h5py.h5s.SpaceID.select_hyperslab(
+                        space_id, tuple(start), tuple(count), op=h5py.h5s.SELECT_OR
+                    )
+            else:
+                for slab in selection:
+                    # each item should be a two element array defining the hyperslab boundary
+                    if len(slab) != 2:
+                        msg = "selection value not valid (not a 2 element array)"
+                        self.log.info(msg)
+                        raise IOError(errno.EINVAL, msg)
+                    start = slab[0]
+                    if isinstance(start, list):
+                        start = tuple(start)
+                    if type(start) is not tuple or len(start) != rank:
+                        msg = "selection value not valid, start element should have number "
+                        msg += "elements equal to rank of referenced dataset"
                         self.log.info(msg)
                         raise IOError(errno.EINVAL, msg)
-                    if stop[i] <= start[i]:
-                        msg = "stop value must be greater than start value for hyperslab selection"
+                    stop = slab[1]
+                    if isinstance(stop, list):
+                        stop = tuple(stop)
+                    if type(stop) is not tuple or len(stop) != rank:
+                        msg = "selection value not valid, count element should have number "
+                        msg += "elements equal to rank of referenced dataset"
                         self.log.info(msg)
                         raise IOError(errno.EINVAL, msg)
-                    count.append(stop[i] - start[i])
-                count = tuple(count)
+                    count = []
+                    for i in range(rank):
+                        if start[i] < 0:
+                            msg = "start value for hyperslab selection must be non-negative"
+                            self.log.info(msg)
+                            raise IOError(errno.EINVAL, msg)
+                        if stop[i] <= start[i]:
+                            msg = "stop value must be greater than start value for hyperslab selection"
+                            self.log.info(msg)
+                            raise IOError(errno.EINVAL, msg)
+                        count.append(stop[i] - start[i])
+                    count = tuple(count)
 
-                h5py.h5s.SpaceID.select_hyperslab(
-                    space_id, start, count, op=h5py.h5s.SELECT_OR
-                )
+                    h5py.h5s.SpaceID.select_hyperslab(
+                        space_id, start, count, op=h5py.h5s.SELECT_OR
+                    )
 
         # now that we've selected the desired region in the space, return a region reference
-        dset_name = dset.name.encode("utf-8")
-        region_ref = h5py.h5r.create(
-            self.f.id, dset_name, h5py.h5r.DATASET_REGION, space_id
-        )
+        # (relative to the dataset itself, looking up its path name is slow)
+        region_ref = h5py.h5r.create(dset.id, b".", h5py.h5r.DATASET_REGION, space_id)
 
         return region_ref
 
@@ -2137,23 +2642,29 @@ class Hdf5db:
         Convert a list to a tuple, recursively.
         Example. [[1,2],[3,4]] -> ((1,2),(3,4))
         """
-        if isinstance(data, (list, tuple)):
-            if rank > 0:
-                return list(self.toTuple(rank - 1, x) for x in data)
-            else:
-                return tuple(self.toTuple(rank - 1, x) for x in data)
-        else:
+        if isinstance(data, np.ndarray):
+            data = data.tolist()  # nested lists in one call
+        if not isinstance(data, (list, tuple)):
             return data
+        if rank > 0:
+            return [self.toTuple(rank - 1, x) for x in data]
+        # element level, only recurse for nested sequences
+        return tuple(
+            [self.toTuple(0, x) if isinstance(x, (list, tuple)) else x for x in data]
+        )
 
     def getDatasetValuesByUuid(self, obj_uuid, slices=Ellipsis, format="json"):
         """
         Get values from dataset identified by obj_uuid.
         If a slices list or tuple is provided, it should have the same
         number of elements as the rank of the dataset.
+        The "numpy" format is the same as "json", except that values of
+        integer and float types are returned as a numpy array rather than
+        converted to a list.
         """
         dset = self.getDatasetObjByUuid(obj_uuid)
-        if format not in ("json", "binary"):
-            msg = "only json and binary formats are supported"
+        if format not in ("json", "binary", "numpy"):
+            msg = "only json, binary and numpy formats are supported"
             self.log.info(msg)
             raise IOError(errno.EINVAL, msg)
 
@@ -2164,8 +2675,7 @@ class Hdf5db:
 
         values = None
         dt = dset.dtype
-        typeItem = getTypeItem(dt)
-        itemSize = getItemSize(typeItem)
+        typeItem, itemSize = self.getDatasetTypeItem(obj_uuid, dset)
         if itemSize == "H5T_VARIABLE" and format == "binary":
             msg = "Only JSON is supported for for this data type"
             self.log.info(msg)
@@ -2178,14 +2688,9 @@ class Hdf5db:
         rank = len(dset.shape)
 
         if rank == 0:
-            # check for null dataspace
-            try:
-                val = dset[...]
-            except IOError:
-                # assume null dataspace, return none
+            # check for null dataspace without reading the value
+            if dset.id.get_space().get_simple_extent_type() == h5py.h5s.NULL:
                 return None
-            if val is None:
-                self.log.warning("no value returned from scalar dataset")
 
         if not isinstance(slices, (list, tuple)) and slices is not Ellipsis:
             msg = "Unexpected error: getDatasetValuesByUuid: bad type for dim parameter"
@@ -2197,6 +2702,9 @@ class Hdf5db:
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
 
+        if format == "numpy" and dt.kind in "OSV":
+            format = "json"  # these types always need conversion
+
         if dt.kind == "O":
             if format != "json":
                 msg = "Only JSON is supported for for this data type"
@@ -2232,17 +2740,53 @@ class Hdf5db:
             else:
                 values = dset[slices].tobytes()
         else:
-            values = dset[slices]
+            if slices is Ellipsis and dset.size > 0 and dt.shape == ():
+                # read the entire dataset directly into a preallocated array
+                values = np.empty(dset.shape, dtype=dt)
+                dset.read_direct(values)
+            else:
+                values = dset[slices]
 
             # just use tolist to dump
             if format == "json":
                 values = values.tolist()
-            else:
+            elif format == "binary":
                 # values = base64.b64encode(dset[slices].tobytes())
                 values = values.tobytes()
 
         return values
 
+    def getDatasetValueBlocksByUuid(self, obj_uuid, format="json", block_size=None):
+        """
+        Generator that yields the values of the dataset identified by obj_uuid
+        in blocks of rows along the first dimension, each as returned by
+        getDatasetValuesByUuid for that block.  block_size is the target number
+        of elements per block, so large datasets can be processed without
+        reading all the values at once.
+        """
+        dset = self.getDatasetObjByUuid(obj_uuid)
+        if dset is None:
+            msg = "Dataset: " + obj_uuid + " not found"
+            self.log.info(msg)
+            raise IOError(errno.ENXIO, msg)
+        if dset.shape is None or len(dset.shape) == 0 or dset.size == 0:
+            # nothing to split up
+            yield self.getDatasetValuesByUuid(obj_uuid, format=format)
+            return
+
+        if not block_size:
+            block_size = 1024 * 1024
+        nrows = dset.shape[0]
+        row_size = dset.size // nrows
+        rows = max(1, block_size // row_size)
+        if dset.chunks and dset.chunks[0] < rows:
+            # read whole chunks where possible
+            rows = (rows // dset.chunks[0]) * dset.chunks[0]
+        other_dims = (slice(None),) * (len(dset.shape) - 1)
+        for start in range(0, nrows, rows):
+            slices = (slice(start, min(start + rows, nrows)),) + other_dims
+            yield self.getDatasetValuesByUuid(obj_uuid, slices=slices, format=format)
+
     """
       doDatasetQueryByUuid: return rows based on query string
         Return rows from a dataset that matches query string.
@@ -2272,8 +2816,7 @@ class Hdf5db:
 
         values = []
         dt = dset.dtype
-        typeItem = getTypeItem(dt)
-        # itemSize = getItemSize(typeItem)
+        typeItem, _ = self.getDatasetTypeItem(obj_uuid, dset)
         if typeItem["class"] != "H5T_COMPOUND":
             msg = "Only compound type datasets can be used as query target"
             self.log.info(msg)
@@ -2301,8 +2844,12 @@ class Hdf5db:
         block_size = self._getBlockSize(dset)
         self.log.info("block_size: " + str(block_size))
 
-        field_names = list(dset.dtype.fields.keys())
-        eval_str = self._getEvalStr(query, field_names)
+        eval_code = self.getQueryCode(query, dt.names)
+
+        # one buffer reused for every block, matches are copied out of it
+        buf = None
+        if start < stop:
+            buf = np.empty((min(block_size, stop - start),), dtype=dt)
 
         while start < stop:
             if limit and (count == limit):
@@ -2310,18 +2857,20 @@ class Hdf5db:
             end = start + block_size
             if end > stop:
                 end = stop
-            rows = dset[start:end]  # read from dataset
-            where_result = np.where(eval(eval_str))
-            index = where_result[0].tolist()
+            n = end - start
+            dset.read_direct(buf, source_sel=np.s_[start:end], dest_sel=np.s_[:n])
+            rows = buf[:n]
+            index = np.flatnonzero(eval(eval_code, _QUERY_GLOBALS, {"rows": rows}))
+            if limit:
+                index = index[: limit - count]  # no more rows than the limit
             if len(index) > 0:
-                for i in index:
-                    row = rows[i]
-                    item = self.bytesArrayToList(row)
-                    values.append(item)
-                    indexes.append(start + i)
-                    count += 1
-                    if limit and (count == limit):
-                        break  # no more rows for this batch
+                # convert the matches a field at a time, then zip the
+                # columns back up into rows
+                matches = rows[index]
+                cols = [self.bytesArrayToList(matches[name]) for name in dt.names]
+                values.extend([list(row) for row in zip(*cols)])
+                indexes.extend((index + start).tolist())
+                count += len(index)
 
             start = end  # go to next block
 
@@ -2338,7 +2887,8 @@ class Hdf5db:
     """
 
     def _getBlockSize(self, dset):
-        target_block_size = 256 * 1000
+        # number of rows that make up QUERY_BLOCK_BYTES
+        target_block_size = max(1, QUERY_BLOCK_BYTES // dset.dtype.itemsize)
         if dset.chunks:
             chunk_size = dset.chunks[0]
             if chunk_size < target_block_size:
@@ -2349,6 +2899,22 @@ class Hdf5db:
             block_size = target_block_size
         return block_size
 
+    def getQueryCode(self, query, field_names):
+        """
+        Return the query compiled for a dataset with the given field names.
+        Compiled once, rather than having eval parse the string per block,
+        and kept since the same queries tend to be repeated.
+        """
+        key = (query, field_names)
+        eval_code = self.queries.get(key)
+        if eval_code is None:
+            eval_str = self._getEvalStr(query, field_names)
+            eval_code = compile(eval_str, "<query>", "eval")
+            if len(self.queries) >= QUERY_CACHE_SIZE:
+                self.queries.clear()
+            self.queries[key] = eval_code
+        return eval_code
+
     """
      _getEvalStr: Get eval string for given query
 
@@ -2357,21 +2923,22 @@ class Hdf5db:
 
     def _getEvalStr(self, query, field_names):
         i = 0
-        eval_str = ""
+        eval_parts = []  # joined at the end, rather than growing a string
         var_name = None
         end_quote_char = None
         var_count = 0
         paren_count = 0
-        black_list = ("import",)  # field names that are not allowed
+        black_list = {"import"}  # field names that are not allowed
         self.log.info("getEvalStr(" + query + ")")
-        for item in black_list:
-            if item in field_names:
-                msg = "invalid field name"
-                self.log.info("EINVAL: " + msg)
-                raise IOError(errno.EINVAL, msg)
-        while i < len(query):
+        field_names = frozenset(field_names)
+        if black_list & field_names:
+            msg = "invalid field name"
+            self.log.info("EINVAL: " + msg)
+            raise IOError(errno.EINVAL, msg)
+        query_len = len(query)
+        while i < query_len:
             ch = query[i]
-            if (i + 1) < len(query):
+            if (i + 1) < query_len:
                 ch_next = query[i + 1]
             else:
                 ch_next = None
@@ -2382,7 +2949,7 @@ class Hdf5db:
                     msg = "unknown field name"
                     self.log.info("EINVAL: " + msg)
                     raise IOError(errno.EINVAL, msg)
-                eval_str += "rows['" + var_name + "']"
+                eval_parts.append(f"rows['{var_name}']")
                 var_name = None
                 var_count += 1
 
@@ -2390,31 +2957,39 @@ class Hdf5db:
                 if ch == end_quote_char:
                     # end of literal
                     end_quote_char = None
-                eval_str += ch
+                eval_parts.append(ch)
             elif ch in ("'", '"'):
                 end_quote_char = ch
-                eval_str += ch
+                eval_parts.append(ch)
             elif ch.isalpha():
                 if ch == "b" and ch_next in ("'", '"'):
-                    eval_str += "b"  # start of a byte string literal
+                    eval_parts.append("b")  # start of a byte string literal
                 elif var_name is None:
                     var_name = ch  # start of a variable
                 else:
                     var_name += ch
             elif ch == "(" and end_quote_char is None:
                 paren_count += 1
-                eval_str += ch
+                eval_parts.append(ch)
             elif ch == ")" and end_quote_char is None:
                 paren_count -= 1
                 if paren_count < 0:
                     msg = "Mismatched paren"
                     self.log.info("EINVAL: " + msg)
                     raise IOError(errno.EINVAL, msg)
-                eval_str += ch
+                eval_parts.append(ch)
             else:
-                # just add to eval_str
-                eval_str += ch
+                # just add to the eval string
+                eval_parts.append(ch)
             i = i + 1
+        if var_name:
+            # query ends with a variable
+            if var_name not in field_names:
+                msg = "unknown field name"
+                self.log.info("EINVAL: " + msg)
+                raise IOError(errno.EINVAL, msg)
+            eval_parts.append(f"rows['{var_name}']")
+            var_count += 1
         if end_quote_char:
             msg = "no matching quote character"
             self.log.info("EINVAL: " + msg)
@@ -2428,7 +3003,7 @@ class Hdf5db:
             self.log.info("EINVAL: " + msg)
             raise IOError(errno.EINVAL, msg)
 
-        return eval_str
+        return "".join(eval_parts)
 
     """
     Get values from dataset identified by obj_uuid using the given
@@ -2443,20 +3018,27 @@ class Hdf5db:
             raise IOError(errno.ENXIO, msg)
 
         rank = len(dset.shape)
-        values = np.zeros(len(points), dtype=dset.dtype)
+        num_points = len(points)
+        values = np.zeros(num_points, dtype=dset.dtype)
+        if num_points == 0:
+            return values.tolist()
         try:
-            i = 0
-            for point in points:
-                if rank == 1:
-                    values[i] = dset[[point]]
-                else:
-                    values[i] = dset[tuple(point)]
-                i += 1
-        except ValueError:
+            coords = np.asarray(points, dtype=np.int64).reshape(num_points, rank)
+        except (TypeError, ValueError):
+            msg = "getDatasetPointSelection, invalid points"
+            self.log.info(msg)
+            raise IOError(errno.EINVAL, msg)
+        if np.any(coords < 0) or np.any(coords >= np.asarray(dset.shape)):
             # out of range error
             msg = "getDatasetPointSelection, out of range error"
             self.log.info(msg)
             raise IOError(errno.EINVAL, msg)
+
+        # read all the points with one element selection
+        fspace = dset.id.get_space()
+        fspace.select_elements(coords)
+        mspace = h5py.h5s.create_simple((num_points,))
+        dset.id.read(mspace, fspace, values)
         return values.tolist()
 
     """
@@ -2483,12 +3065,9 @@ class Hdf5db:
             raise IOError(errno.ENXIO, msg)
 
         dt = dset.dtype
-        typeItem = getTypeItem(dt)
-        itemSize = getItemSize(typeItem)
-        rank = len(dset.shape)
-        arraySize = 1
-        for extent in dset.shape:
-            arraySize *= arraySize
+        typeItem, itemSize = self.getDatasetTypeItem(obj_uuid, dset)
+        shape = dset.shape  # h5py gets the shape from the file on each access
+        rank = len(shape)
 
         if itemSize == "H5T_VARIABLE" and format == "binary":
             msg = "Only JSON is supported for for this data type"
@@ -2499,7 +3078,7 @@ class Hdf5db:
             slices = []
             # create selection that covers entire dataset
             for dim in range(rank):
-                s = slice(0, dset.shape[dim], 1)
+                s = slice(0, shape[dim], 1)
                 slices.append(s)
             slices = tuple(slices)
 
@@ -2515,26 +3094,19 @@ class Hdf5db:
 
         npoints = 1
         np_shape = []
-        for i in range(rank):
-            s = slices[i]
-
-            if s.start < 0 or s.step <= 0 or s.stop < s.start:
-                msg = "invalid slice specification"
-                self.log.info(msg)
-                raise IOError(errno.EINVAL, msg)
-            if s.stop > dset.shape[i]:
+        for s, extent in zip(slices, shape):
+            # a slice that selects nothing (stop - start < step) is invalid too
+            if (
+                s.start < 0
+                or s.step <= 0
+                or s.stop > extent
+                or s.stop - s.start < s.step
+            ):
                 msg = "invalid slice specification"
                 self.log.info(msg)
                 raise IOError(errno.EINVAL, msg)
             np_shape.append(s.stop - s.start)
-
-            count = (s.stop - s.start) // s.step
-            if count <= 0:
-                msg = "invalid slice specification"
-                self.log.info(msg)
-                raise IOError(errno.EINVAL, msg)
-
-            npoints *= count
+            npoints *= (s.stop - s.start) // s.step
 
         np_shape = tuple(np_shape)  # for comparison with ndarray shape
 
@@ -2544,19 +3116,19 @@ class Hdf5db:
         # each element must be a tuple, but the JSON decoder
         # gives us a list instead.
         if format != "binary" and dset.dtype.names and isinstance(data, (list, tuple)):
-            data = self.toTuple(rank, data)
-            # for i in range(len(data)):
-            #    converted_data.append(self.toTuple(data[i]))
-            # data = converted_data
-        else:
-            h5t_check = h5py.check_dtype(ref=dset.dtype)
-            if h5t_check in (h5py.Reference, h5py.RegionReference):
-                # convert data to data refs
-                if format == "binary":
-                    msg = "Only JSON is supported for for this data type"
-                    self.log.info(msg)
-                    raise IOError(errno.EINVAL, msg)
-                data = self.listToRef(data)
+            fields = dset.dtype.fields.values()
+            if rank == 1 and all(f[0].kind in _SIMPLE_FIELD_KINDS for f in fields):
+                # no nested values, so numpy just needs each row as a tuple
+                data = [tuple(row) if type(row) is list else row for row in data]
+            else:
+                data = self.toTuple(rank, data)
+        elif typeItem["class"] == "H5T_REFERENCE":
+            # convert data to data refs
+            if format == "binary":
+                msg = "Only JSON is supported for for this data type"
+                self.log.info(msg)
+                raise IOError(errno.EINVAL, msg)
+            data = self.listToRef(data)
 
         if format == "binary":
             if npoints * itemSize != len(data):
@@ -2568,17 +3140,28 @@ class Hdf5db:
                 )
                 self.log.info(msg)
                 raise IOError(errno.EINVAL, msg)
-            if dset.dtype.shape == ():
-                arr = np.fromstring(data, dtype=dset.dtype)
-                arr = arr.reshape(np_shape)  # conform to selection shape
-            else:
-                # tricy array type!
-                arr = np.empty(np_shape, dtype=dset.dtype)
-                base_arr = np.fromstring(data, dtype=dset.dtype.base)
-                base_shape = list(np_shape)
-                base_shape.extend(dset.dtype.shape)  # add on the type dimensions
-                base_arr = base_arr.reshape(base_shape)
-                arr[...] = base_arr
+            chunks = dset.chunks
+            if (
+                chunks
+                and dt.kind in "biuf"
+                and dset.id.get_create_plist().get_nfilters() == 0
+                and all(
+                    s.step == 1 and s.start % extent == 0 and s.stop - s.start == extent
+                    for s, extent in zip(slices, chunks)
+                )
+            ):
+                # the data is exactly one unfiltered chunk in the dataset's
+                # own type, so write it as is rather than through a selection
+                offsets = tuple(s.start for s in slices)
+                dset.id.write_direct_chunk(offsets, data)
+                self.setModifiedTime(obj_uuid)
+                return True
+            # frombuffer gives a (read only) view of data, rather than a copy.
+            # For array types h5py takes the base type values with the type
+            # dimensions added on to the selection shape (for other types
+            # the base is the type itself and there are no type dimensions)
+            arr = np.frombuffer(data, dtype=dt.base)
+            arr = arr.reshape(np_shape + dt.shape)  # conform to selection shape
         else:
             # data is json
             if npoints == 1 and len(dset.dtype) > 1:
@@ -2588,24 +3171,11 @@ class Hdf5db:
                 ]
 
             arr = np.array(data, dtype=dset.dtype)
-            # raise an exception of the array shape doesn't match the selection shape
-            # allow if the array is a scalar and the selection shape is one element,
-            # numpy is ok with this
-            np_index = 0
-            for dim in range(len(arr.shape)):
-                data_extent = arr.shape[dim]
-                selection_extent = 1
-                if np_index < len(np_shape):
-                    selection_extent = np_shape[np_index]
-                if selection_extent == data_extent:
-                    np_index += 1
-                    continue  # good
-                if data_extent == 1:
-                    continue  # skip singleton selection
-                if selection_extent == 1:
-                    np_index += 1
-                    continue  # skip singleton selection
-
+            # raise an exception if the array shape can't be broadcast with the
+            # selection shape (so scalars and singleton dimensions are ok)
+            try:
+                np.broadcast_shapes(arr.shape, np_shape)
+            except ValueError:
                 # selection/data mismatch!
                 msg = "data shape doesn't match selection shape"
                 msg += "--data shape: " + str(arr.shape)
@@ -2657,8 +3227,7 @@ class Hdf5db:
             raise IOError(errno.ENXIO, msg)
 
         dt = dset.dtype
-        typeItem = getTypeItem(dt)
-        itemSize = getItemSize(typeItem)
+        typeItem, itemSize = self.getDatasetTypeItem(obj_uuid, dset)
         if itemSize == "H5T_VARIABLE" and format == "binary":
             msg = "Only JSON is supported for for this data type"
             self.log.info(msg)
@@ -2669,32 +3238,53 @@ class Hdf5db:
         # need some special conversion for compound types --
         # each element must be a tuple, but the JSON decoder
         # gives us a list instead.
-        if format == "json" and len(dset.dtype) > 1 and type(data) in (list, tuple):
-            raise NotImplementedError("need some special conversion for compound types")
-            # converted_data = self.toTuple(rank, data)
-            # for i in range(len(data)):
-            #    converted_data.append(self.toTuple(data[i]))
-            # data = converted_data
-
-        if format == "json":
-            try:
-                i = 0
-                for point in points:
-                    if rank == 1:
-                        dset[[point]] = data[i]
+        if format == "json" and dset.dtype.names and type(data) in (list, tuple):
+            data = self.toTuple(1, data)  # one value per point
+
+        num_points = len(points)
+        try:
+            coords = np.asarray(points, dtype=np.int64).reshape(num_points, rank)
+        except (TypeError, ValueError):
+            msg = "setDatasetValuesByPointSelection, invalid points"
+            self.log.info(msg)
+            raise IOError(errno.EINVAL, msg)
+        if np.any(coords < 0) or np.any(coords >= np.asarray(dset.shape)):
+            # out of range error
+            msg = "setDatasetValuesByPointSelection, out of range error"
+            self.log.info(msg)
+            raise IOError(errno.EINVAL, msg)
+
+        # values are in terms of the base type for array types, with the
+        # array dimensions added on
+        try:
+            if format == "json" and dt.kind == "O":
+                # vlen types, each value is a separate object of its own length
+                if len(data) != num_points:
+                    raise ValueError("number of values doesn't match points")
+                vlen_base = h5py.check_dtype(vlen=dt)
+                arr = np.empty((num_points,), dtype=dt)
+                for i, value in enumerate(data):
+                    if vlen_base is None or vlen_base in (str, bytes):
+                        arr[i] = value
                     else:
-                        dset[tuple(point)] = data[i]
-                    i += 1
-            except ValueError:
-                # out of range error
-                msg = "setDatasetValuesByPointSelection, out of range error"
-                self.log.info(msg)
-                raise IOError(errno.EINVAL, msg)
+                        arr[i] = np.asarray(value, dtype=vlen_base)
+            elif format == "json":
+                arr = np.asarray(data, dtype=dt.base)
+            else:
+                # binary
+                arr = np.frombuffer(data, dtype=dt.base)
+            arr = arr.reshape((num_points,) + dt.shape)
+        except (TypeError, ValueError):
+            msg = "setDatasetValuesByPointSelection, data doesn't match points"
+            self.log.info(msg)
+            raise IOError(errno.EINVAL, msg)
 
-        else:
-            # binary
-            arr = np.fromstring(data, dtype=dset.dtype)
-            dset[points] = arr  # coordinate write
+        if num_points > 0:
+            # write all the points with one element selection
+            fspace = dset.id.get_space()
+            fspace.select_elements(coords)
+            mspace = h5py.h5s.create_simple((num_points,))
+            dset.id.write(mspace, fspace, arr, mtype=h5py.h5t.py_create(dt))
 
         # update modified time
         self.setModifiedTime(obj_uuid)
@@ -2708,12 +3298,11 @@ class Hdf5db:
     def createDataset(
         self, datatype, datashape, max_shape=None, creation_props=None, obj_uuid=None
     ):
-        self.initFile()
         if self.readonly:
             msg = "Unable to create dataset (Updates are not allowed)"
             self.log.info(msg)
             raise IOError(errno.EPERM, msg)
-        datasets = self.dbGrp["{datasets}"]
+        datasets = self.getDbGroup("{datasets}")
         if not obj_uuid:
             obj_uuid = str(uuid.uuid1())
         dt = None
@@ -2861,11 +3450,7 @@ class Hdf5db:
             # See: https://github.com/h5py/h5py/issues/279
             # work around this by using low-level interface.
             # first create a temp scalar dataset so we can pull out the typeid
-            tmpGrp = None
-            if "{tmp}" not in self.dbGrp:
-                tmpGrp = self.dbGrp.create_group("{tmp}")
-            else:
-                tmpGrp = self.dbGrp["{tmp}"]
+            tmpGrp = self.getTmpGroup()
             tmpDataset = tmpGrp.create_dataset(obj_uuid, shape=(1,), dtype=dt_ref)
             tid = tmpDataset.id.get_type()
             sid = sid = h5py.h5s.create(h5py.h5s.NULL)
@@ -2901,10 +3486,9 @@ class Hdf5db:
             msg = "Unexpected failure to create dataset"
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
-        # store reverse map as an attribute
+        # store reverse map
         addr = h5py.h5o.get_info(dataset_id).addr
-        addrGrp = self.dbGrp["{addr}"]
-        addrGrp.attrs[str(addr)] = obj_uuid
+        self.setUUIDByAddress(addr, obj_uuid)
 
         # save creation props if any
         if creation_props:
@@ -2928,7 +3512,6 @@ class Hdf5db:
 
     def resizeDataset(self, obj_uuid, shape):
         self.log.info("resizeDataset(")  # + obj_uuid + "): ") # + str(shape))
-        self.initFile()
         if self.readonly:
             msg = "Unable to resize dataset (Updates are not allowed)"
             self.log.info(msg)
@@ -2953,28 +3536,6 @@ class Hdf5db:
         # update modified time
         self.setModifiedTime(obj_uuid)
 
-    """
-    Check if link points to given target (as a HardLink)
-    """
-
-    def isObjectHardLinked(self, parentGroup, targetGroup, linkName):
-        try:
-            linkObj = parentGroup.get(linkName, None, False, True)
-            linkClass = linkObj.__class__.__name__
-        except TypeError:
-            # UDLink? Ignore for now
-            return False
-        if linkClass == "SoftLink":
-            return False
-        elif linkClass == "ExternalLink":
-            return False
-        elif linkClass == "HardLink":
-            if parentGroup[linkName] == targetGroup:
-                return True
-        else:
-            self.log.warning("unexpected linkclass: " + linkClass)
-            return False
-
     """
     Delete Dataset, Group or Datatype by UUID
     """
@@ -2984,14 +3545,13 @@ class Hdf5db:
             msg = "unexpected objtype: " + objtype
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
-        self.initFile()
         self.log.info("delete uuid: " + obj_uuid)
         if self.readonly:
             msg = "Unable to delete object (Updates are not allowed)"
             self.log.info(msg)
             raise IOError(errno.EPERM, msg)
 
-        if obj_uuid == self.dbGrp.attrs["rootUUID"] and objtype == "group":
+        if obj_uuid == self.root_uuid and objtype == "group":
             # can't delete root group
             msg = "Unable to delete group (root group may not be deleted)"
             self.log.info(msg)
@@ -3001,13 +3561,13 @@ class Hdf5db:
         tgt = None
         if objtype == "dataset":
             tgt = self.getDatasetObjByUuid(obj_uuid)
-            dbCol = self.dbGrp["{datasets}"]
+            dbCol = self.getDbGroup("{datasets}")
         elif objtype == "group":
             tgt = self.getGroupObjByUuid(obj_uuid)
-            dbCol = self.dbGrp["{groups}"]
+            dbCol = self.getDbGroup("{groups}")
         else:  # datatype
             tgt = self.getCommittedTypeObjByUuid(obj_uuid)
-            dbCol = self.dbGrp["{datatypes}"]
+            dbCol = self.getDbGroup("{datatypes}")
 
         if tgt is None:
             msg = "Unable to delete " + objtype + ", uuid: " + obj_uuid + " not found"
@@ -3017,26 +3577,35 @@ class Hdf5db:
         # unlink from root (if present)
         self.unlinkObject(self.f["/"], tgt)
 
-        groups = self.dbGrp["{groups}"]
+        groups = self.getDbGroup("{groups}")
         # iterate through each group in the file and unlink tgt if it is linked
         # by the group.
         # We'll store a list of links to be removed as we go, and then actually
         # remove the links after the iteration is done (otherwise we can run into issues
         # where the key has become invalid)
         linkList = []  # this is our list
-        for uuidName in groups.attrs:
-            grpRef = groups.attrs[uuidName]
+        addr = h5py.h5o.get_info(tgt.id).addr
+        linkNames = []
+
+        def visitLink(name, info):
+            # the link info gives the address of hard linked objects,
+            # so there's no need to open each object to compare it
+            if info.type == h5py.h5l.TYPE_HARD and info.u == addr:
+                linkNames.append(name.decode("utf-8"))
+
+        for grpRef in groups.attrs.values():
             # de-reference handle
             grp = self.f[grpRef]
-            for linkName in grp:
-                if self.isObjectHardLinked(grp, tgt, linkName):
-                    linkList.append({"group": grp, "link": linkName})
+            grp.id.links.iterate(visitLink, info=True)
+            for linkName in linkNames:
+                linkList.append({"group": grp, "link": linkName})
+            linkNames.clear()
         for item in linkList:
             self.unlinkObjectItem(item["group"], tgt, item["link"])
 
-        addr = h5py.h5o.get_info(tgt.id).addr
-        addrGrp = self.dbGrp["{addr}"]
+        addrGrp = self.getDbGroup("{addr}")
         del addrGrp.attrs[str(addr)]  # remove reverse map
+        self.addr_map.pop(addr, None)
         dbRemoved = False
 
         # finally, remove the dataset from db
@@ -3052,7 +3621,7 @@ class Hdf5db:
                 self.log.info(
                     "removing: " + obj_uuid + " from non-anonymous collection"
                 )
-                del dbCol.attrs[obj_uuid]
+                self.removeObjectRef(dbCol, obj_uuid)
                 dbRemoved = True
 
         if not dbRemoved:
@@ -3060,16 +3629,26 @@ class Hdf5db:
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
 
+        if objtype == "dataset":
+            self.dset_cache.pop(("datasets", obj_uuid), None)
+        else:
+            self.obj_cache.pop((objtype + "s", obj_uuid), None)
+        if objtype == "datatype":
+            self.committed_types.clear()  # the address may get reused
+            self.committed_type_items.pop(obj_uuid, None)
+        elif objtype == "dataset":
+            self.dataset_types.pop(obj_uuid, None)
+            self.hdf5_creation_props.pop(obj_uuid, None)
+
         # note when the object was deleted
-        self.setModifiedTime(obj_uuid)
+        self.setDeleted(obj_uuid)
 
         return True
 
     def getGroupItemByUuid(self, obj_uuid):
-        self.initFile()
         grp = self.getGroupObjByUuid(obj_uuid)
         if grp is None:
-            if self.getModifiedTime(obj_uuid, useRoot=False):
+            if self.isDeleted(obj_uuid):
                 msg = "Group with uuid: " + obj_uuid + " has been previously deleted"
                 self.log.info(msg)
                 raise IOError(errno.ENOENT, msg)
@@ -3078,6 +3657,12 @@ class Hdf5db:
                 self.log.info(msg)
                 raise IOError(errno.ENXIO, msg)
 
+        return self.getGroupItemByObj(grp, obj_uuid)
+
+    def getGroupItemByObj(self, grp, obj_uuid):
+        """
+        Same as getGroupItemByUuid, for a group that has already been opened
+        """
         linkCount = len(grp)
         if "__db__" in grp:
             linkCount -= 1  # don't include the db group
@@ -3156,7 +3741,6 @@ class Hdf5db:
             self.log.info(msg)
             raise IOError(errno.EINVAL, msg)
 
-        self.initFile()
         parent = self.getGroupObjByUuid(grpUuid)
         if parent is None:
             msg = "Parent group: " + grpUuid + " of link not found"
@@ -3175,10 +3759,7 @@ class Hdf5db:
                 )
         else:
             self.log.info("link not found")
-            mtime = self.getModifiedTime(
-                grpUuid, objType="link", name=link_name, useRoot=False
-            )
-            if mtime:
+            if self.isDeleted(grpUuid, objType="link", name=link_name):
                 msg = (
                     "Link ["
                     + link_name
@@ -3202,12 +3783,17 @@ class Hdf5db:
         if limit:
             self.log.info("...limit: " + str(limit))
 
-        self.initFile()
         parent = self.getGroupObjByUuid(grpUuid)
         if parent is None:
             msg = "Parent group: " + grpUuid + " not found, no links returned"
             self.log.info(msg)
             raise IOError(errno.ENXIO, msg)
+        return self.getLinkItemsByObj(parent, marker=marker, limit=limit)
+
+    def getLinkItemsByObj(self, parent, marker=None, limit=0):
+        """
+        Same as getLinkItems, for a group that has already been opened
+        """
         items = []
         gotMarker = True
         if marker is not None:
@@ -3276,11 +3862,12 @@ class Hdf5db:
         else:
             # SoftLink or External Link - we can just remove the key
             del grp[link_name]
+            self.path_cache.clear()
             linkDeleted = True
 
         if linkDeleted:
             # update timestamp
-            self.setModifiedTime(grpUuid, objType="link", name=link_name)
+            self.setDeleted(grpUuid, objType="link", name=link_name)
 
         return linkDeleted
 
@@ -3291,14 +3878,13 @@ class Hdf5db:
             msg = "Unexpected col_type: [" + col_type + "]"
             self.log.error(msg)
             raise IOError(errno.EIO, msg)
-        self.initFile()
         col = None  # Group, Dataset, or Datatype
         if col_type == "datasets":
-            col = self.dbGrp["{datasets}"]
+            col = self.getDbGroup("{datasets}")
         elif col_type == "groups":
-            col = self.dbGrp["{groups}"]
+            col = self.getDbGroup("{groups}")
         else:  # col_type == "datatypes"
-            col = self.dbGrp["{datatypes}"]
+            col = self.getDbGroup("{datatypes}")
 
         uuids = []
         count = 0
@@ -3341,7 +3927,7 @@ class Hdf5db:
     def getDBCollection(self, obj_uuid):
         dbCollections = self.getDBCollections()
         for dbCollectionName in dbCollections:
-            col = self.dbGrp[dbCollectionName]
+            col = self.getDbGroup(dbCollectionName)
             if obj_uuid in col or obj_uuid in col.attrs:
                 return col
         return None
@@ -3377,12 +3963,13 @@ class Hdf5db:
                     obj_uuid = self.getUUIDByAddress(addr)
                     self.log.info("converting: " + obj_uuid + " to anonymous obj")
                     dbCol = self.getDBCollection(obj_uuid)
-                    del dbCol.attrs[obj_uuid]  # remove the object ref
+                    self.removeObjectRef(dbCol, obj_uuid)  # remove the object ref
                     dbCol[obj_uuid] = obj  # add a hardlink
                 self.log.info(
                     "deleting link: [" + link_name + "] from: " + parentGrp.name
                 )
                 del parentGrp[link_name]
+                self.path_cache.clear()
                 linkDeleted = True
         else:
             self.log.info("unlinkObjectItem: link is not a hardlink, ignoring")
@@ -3394,7 +3981,6 @@ class Hdf5db:
         return True
 
     def linkObject(self, parentUUID, childUUID, link_name):
-        self.initFile()
         if self.readonly:
             msg = "Unable to create link (Updates are not allowed)"
             self.log.info(msg)
@@ -3422,6 +4008,7 @@ class Hdf5db:
             self.log.info("linkname already exists, deleting")
             self.unlinkObjectItem(parentObj, None, link_name)
         parentObj[link_name] = childObj
+        self.path_cache.clear()
 
         # convert this from an anonymous object to ref if needed
         dbCol = self.getDBCollection(childUUID)
@@ -3437,7 +4024,6 @@ class Hdf5db:
         return True
 
     def createSoftLink(self, parentUUID, linkPath, link_name):
-        self.initFile()
         if self.readonly:
             msg = "Unable to create link (Updates are not allowed)"
             self.log.info(msg)
@@ -3452,6 +4038,7 @@ class Hdf5db:
             self.log.info("linkname already exists, deleting")
             del parentObj[link_name]  # delete old link
         parentObj[link_name] = h5py.SoftLink(linkPath)
+        self.path_cache.clear()
 
         now = time.time()
         self.setCreateTime(parentUUID, objType="link", name=link_name, timestamp=now)
@@ -3460,7 +4047,6 @@ class Hdf5db:
         return True
 
     def createExternalLink(self, parentUUID, extPath, linkPath, link_name):
-        self.initFile()
         if self.readonly:
             msg = "Unable to create link (Updates are not allowed)"
             self.log.info(msg)
@@ -3475,6 +4061,7 @@ class Hdf5db:
             self.log.info("linkname already exists, deleting")
             del parentObj[link_name]  # delete old link
         parentObj[link_name] = h5py.ExternalLink(extPath, linkPath)
+        self.path_cache.clear()
 
         now = time.time()
         self.setCreateTime(parentUUID, objType="link", name=link_name, timestamp=now)
@@ -3483,19 +4070,17 @@ class Hdf5db:
         return True
 
     def createGroup(self, obj_uuid=None):
-        self.initFile()
         if self.readonly:
             msg = "Unable to create group (Updates are not allowed)"
             self.log.info(msg)
             raise IOError(errno.EPERM, msg)
-        groups = self.dbGrp["{groups}"]
+        groups = self.getDbGroup("{groups}")
         if not obj_uuid:
             obj_uuid = str(uuid.uuid1())
         newGroup = groups.create_group(obj_uuid)
-        # store reverse map as an attribute
+        # store reverse map
         addr = h5py.h5o.get_info(newGroup.id).addr
-        addrGrp = self.dbGrp["{addr}"]
-        addrGrp.attrs[str(addr)] = obj_uuid
+        self.setUUIDByAddress(addr, obj_uuid)
 
         # set timestamps
         now = time.time()
@@ -3505,9 +4090,8 @@ class Hdf5db:
         return obj_uuid
 
     def getNumberOfGroups(self):
-        self.initFile()
         count = 0
-        groups = self.dbGrp["{groups}"]
+        groups = self.getDbGroup("{groups}")
         count += len(groups)  # anonymous groups
         count += len(groups.attrs)  # linked groups
         count += 1  # add of for root group
@@ -3515,17 +4099,15 @@ class Hdf5db:
         return count
 
     def getNumberOfDatasets(self):
-        self.initFile()
         count = 0
-        datasets = self.dbGrp["{datasets}"]
+        datasets = self.getDbGroup("{datasets}")
         count += len(datasets)  # anonymous datasets
         count += len(datasets.attrs)  # linked datasets
         return count
 
     def getNumberOfDatatypes(self):
-        self.initFile()
         count = 0
-        datatypes = self.dbGrp["{datatypes}"]
+        datatypes = self.getDbGroup("{datatypes}")
         count += len(datatypes)  # anonymous datatypes
         count += len(datatypes.attrs)  # linked datatypes
         return count
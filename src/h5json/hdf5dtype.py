@@ -14,6 +14,8 @@
 This class is used to map between HDF5 type representations and numpy types
 
 """
+import json
+import functools
 import numpy as np
 from h5py.h5t import special_dtype
 from h5py.h5t import check_dtype
@@ -68,6 +70,20 @@ def getTypeResponse(typeItem):
     return response
 
 
+def getTypeResponseCached(typeItem):
+    """
+    Same as getTypeResponse, but the response is cached for each distinct
+    type, so files with many objects of the same type only convert it once.
+    The returned object is shared between calls and should not be modified.
+    """
+    return _getTypeResponse(json.dumps(typeItem, sort_keys=True))
+
+
+@functools.lru_cache(maxsize=4096)
+def _getTypeResponse(type_json):
+    return getTypeResponse(json.loads(type_json))
+
+
 def getItemSize(typeItem):
     """
     Get size of an item in bytes.
@@ -172,8 +188,19 @@ def getItemSize(typeItem):
 """
 
 
+# type items of plain integer and float dtypes, keyed by dtype
+_numeric_type_items = {}
+
+
 def getTypeItem(dt):
 
+    # h5py enum, vlen and reference dtypes compare equal to plain numpy
+    # dtypes and are told apart by their metadata, so only dtypes without
+    # metadata can be looked up by value
+    cacheable = dt.kind in "iuf" and dt.metadata is None
+    if cacheable and dt in _numeric_type_items:
+        return dict(_numeric_type_items[dt])
+
     predefined_int_types = {
         "int8": "H5T_STD_I8",
         "uint8": "H5T_STD_U8",
@@ -318,6 +345,9 @@ def getTypeItem(dt):
         # unexpected kind
         raise TypeError("unexpected dtype kind: " + dt.kind)
 
+    if cacheable:
+        _numeric_type_items[dt] = dict(type_info)
+
     return type_info
 
 
@@ -13,7 +13,6 @@ import json
 import argparse
 import h5py
 import logging
-import logging.handlers
 
 from h5json import Hdf5db
 
@@ -17,6 +17,8 @@ import os.path as op
 import stat
 import logging
 import shutil
+import h5py
+import numpy as np
 from h5json import Hdf5db
 
 
@@ -245,6 +247,20 @@ class Hdf5dbTest(unittest.TestCase):
             numLinks = db.getNumLinksToObject(g1)
             self.assertEqual(numLinks, 1)
 
+    def testGetNumLinksAnonymous(self):
+        filepath = getFile("tall.h5", "getnumlinksanon.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rootUuid = db.getUUIDByPath("/")
+            grpUuid = db.createGroup()
+            grp = db.getGroupObjByUuid(grpUuid)
+            self.assertEqual(db.getNumLinksToObject(grp), 0)
+            db.linkObject(rootUuid, grpUuid, "link1")
+            self.assertEqual(db.getNumLinksToObject(grp), 1)
+            db.linkObject(rootUuid, grpUuid, "link2")
+            self.assertEqual(db.getNumLinksToObject(grp), 2)
+            db.unlinkItem(rootUuid, "link1")
+            self.assertEqual(db.getNumLinksToObject(grp), 1)
+
     def testGetLinks(self):
         g12_links = ("extlink", "g1.2.1")
         hardLink = None
@@ -277,6 +293,83 @@ class Hdf5dbTest(unittest.TestCase):
             numRootChildren = len(db.getLinkItems(rootUuid))
             self.assertEqual(numRootChildren, 1)
 
+    def testDeletedItems(self):
+        filepath = getFile("tall.h5", "deleteditems.h5")
+        with Hdf5db(filepath, app_logger=self.log, update_timestamps=False) as db:
+            rootUuid = db.getUUIDByPath("/")
+            db.unlinkItem(rootUuid, "g2")
+            db.deleteAttribute("groups", rootUuid, "attr1")
+            # deleted items are reported as such without timestamps
+            with self.assertRaises(IOError) as cm:
+                db.getLinkItemByUuid(rootUuid, "g2")
+            self.assertEqual(cm.exception.errno, errno.ENOENT)
+            with self.assertRaises(IOError) as cm:
+                db.getAttributeItem("groups", rootUuid, "attr1")
+            self.assertEqual(cm.exception.errno, errno.ENOENT)
+            with self.assertRaises(IOError) as cm:
+                db.getAttributeItem("groups", rootUuid, "attr3")
+            self.assertEqual(cm.exception.errno, errno.ENXIO)
+
+    def testNullReferences(self):
+        filepath = getFile("tall.h5", "nullrefs.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            db.getUUIDByPath("/")
+            for i in range(2):
+                ref = db.getNullReference()
+                self.assertTrue(isinstance(ref, h5py.Reference))
+                self.assertFalse(ref)
+                regref = db.getNullRegionReference()
+                self.assertTrue(isinstance(regref, h5py.RegionReference))
+                self.assertFalse(regref)
+
+    def testTimeStamps(self):
+        filepath = getFile("tall.h5", "timestamps.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rootUuid = db.getUUIDByPath("/")
+            g1Uuid = db.getUUIDByPath("/g1")
+            rootTime = db.getCreateTime(rootUuid)
+            # objects without a timestamp get the root's
+            self.assertEqual(db.getCreateTime(g1Uuid), rootTime)
+            self.assertEqual(db.getCreateTime(g1Uuid, useRoot=False), None)
+            db.setCreateTime(g1Uuid, timestamp=1000)
+            self.assertEqual(db.getCreateTime(g1Uuid), 1000)
+            # modified time defaults to the create time
+            self.assertEqual(db.getModifiedTime(g1Uuid), 1000)
+            db.setModifiedTime(g1Uuid, timestamp=2000)
+            self.assertEqual(db.getModifiedTime(g1Uuid), 2000)
+            self.assertEqual(db.getCreateTime(g1Uuid), 1000)
+
+        # re-open and verify the timestamps were saved
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            self.assertEqual(db.getUUIDByPath("/g1"), g1Uuid)
+            self.assertEqual(db.getCreateTime(g1Uuid), 1000)
+            self.assertEqual(db.getModifiedTime(g1Uuid), 2000)
+
+        # same again with all the timestamps read in one go
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            db.loadTimeStamps("{ctime}")
+            db.loadTimeStamps("{mtime}")
+            self.assertEqual(db.getCreateTime(g1Uuid), 1000)
+            self.assertEqual(db.getModifiedTime(g1Uuid), 2000)
+            g2Uuid = db.getUUIDByPath("/g2")
+            self.assertEqual(db.getCreateTime(g2Uuid, useRoot=False), None)
+            db.setCreateTime(g2Uuid, timestamp=3000)
+            self.assertEqual(db.getCreateTime(g2Uuid, useRoot=False), 3000)
+
+    def testRelinkPath(self):
+        # get test file
+        filepath = getFile("tall.h5", "relinkpath.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rootUuid = db.getUUIDByPath("/")
+            g2Uuid = db.getUUIDByPath("/g2")
+            db.unlinkItem(rootUuid, "g2")
+            with self.assertRaises(KeyError):
+                db.getUUIDByPath("/g2")
+            g1Uuid = db.getUUIDByPath("/g1")
+            db.linkObject(rootUuid, g1Uuid, "g2")
+            self.assertEqual(db.getUUIDByPath("/g2"), g1Uuid)
+            self.assertNotEqual(g1Uuid, g2Uuid)
+
     def testDeleteUDLink(self):
         # get test file
         filepath = getFile("tall_with_udlink.h5", "deleteudlink.h5")
@@ -341,6 +434,22 @@ class Hdf5dbTest(unittest.TestCase):
             for i in range(20):
                 self.assertEqual(d112_values[i], i)
 
+    def testGetDatasetOffset(self):
+        filepath = getFile("h5ex_d_rdwr.h5", "getdatasetoffset.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            dsetUuid = db.getUUIDByPath("/DS1")
+            self.assertEqual(db.getDatasetOffsetByUuid(dsetUuid), 2144)
+
+        filepath = getFile("h5ex_d_chunk.h5", "getdatasetoffset_chunk.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            dsetUuid = db.getUUIDByPath("/DS1")
+            self.assertTrue(db.getDatasetOffsetByUuid(dsetUuid) > 0)
+
+        filepath = getFile("h5ex_d_compact.h5", "getdatasetoffset_compact.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            dsetUuid = db.getUUIDByPath("/DS1")
+            self.assertEqual(db.getDatasetOffsetByUuid(dsetUuid), None)
+
     def testReadDatasetBinary(self):
         filepath = getFile("tall.h5", "readdatasetbinary.h5")
         with Hdf5db(filepath, app_logger=self.log) as db:
@@ -355,6 +464,124 @@ class Hdf5dbTest(unittest.TestCase):
             d112_data = db.getDatasetValuesByUuid(d112Uuid, format="binary")
             self.assertEqual(len(d112_data), 80)  # 20x(4 byte type)
 
+    def testReadDatasetNumpy(self):
+        filepath = getFile("compound.h5", "readdatasetnumpy.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            # types that need conversion are returned the same as for json
+            dset_uuid = db.getUUIDByPath("/dset")
+            dset_values = db.getDatasetValuesByUuid(dset_uuid, format="numpy")
+            self.assertEqual(dset_values, db.getDatasetValuesByUuid(dset_uuid))
+
+        filepath = getFile("tall.h5", "readdatasetnumpy_tall.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            d111Uuid = db.getUUIDByPath("/g1/g1.1/dset1.1.1")
+            d111_values = db.getDatasetValuesByUuid(d111Uuid, format="numpy")
+            self.assertTrue(isinstance(d111_values, np.ndarray))
+            self.assertEqual(d111_values.shape, (10, 10))
+            self.assertEqual(d111_values.tolist(), db.getDatasetValuesByUuid(d111Uuid))
+
+    def testReadDatasetBlocks(self):
+        filepath = getFile("tall.h5", "readdatasetblocks.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            d111Uuid = db.getUUIDByPath("/g1/g1.1/dset1.1.1")
+            blocks = list(db.getDatasetValueBlocksByUuid(d111Uuid, block_size=30))
+            self.assertEqual(len(blocks), 4)  # 3 rows of 10 per block
+            self.assertEqual(len(blocks[0]), 3)
+            self.assertEqual(len(blocks[3]), 1)
+            values = []
+            for block in blocks:
+                values.extend(block)
+            self.assertEqual(values, db.getDatasetValuesByUuid(d111Uuid))
+
+    def testReadDatasetPoints(self):
+        filepath = getFile("tall.h5", "readdatasetpoints.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            d111Uuid = db.getUUIDByPath("/g1/g1.1/dset1.1.1")
+            data = db.getDatasetValuesByUuid(d111Uuid)
+            points = [[9, 9], [0, 1], [4, 2], [0, 1]]
+            values = db.getDatasetPointSelectionByUuid(d111Uuid, points)
+            self.assertEqual(values, [data[p[0]][p[1]] for p in points])
+            with self.assertRaises(IOError):
+                db.getDatasetPointSelectionByUuid(d111Uuid, [[0, 10]])
+
+    def testWriteDatasetPoints(self):
+        filepath = getFile("empty.h5", "writedatasetpoints.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rsp = db.createDataset("H5T_STD_I32LE", (3, 3))
+            dset_uuid = rsp["id"]
+            db.setDatasetValuesByPointSelection(dset_uuid, [7, 8], [[2, 1], [0, 2]])
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, [[0, 0, 8], [0, 0, 0], [0, 7, 0]])
+            # out of range
+            with self.assertRaises(IOError):
+                db.setDatasetValuesByPointSelection(dset_uuid, [1], [[3, 0]])
+            # more values than points
+            with self.assertRaises(IOError):
+                db.setDatasetValuesByPointSelection(dset_uuid, [1, 2], [[0, 0]])
+
+            datatype = {"class": "H5T_ARRAY", "dims": [2], "base": "H5T_STD_I16LE"}
+            rsp = db.createDataset(datatype, (3,))
+            dset_uuid = rsp["id"]
+            db.setDatasetValuesByPointSelection(dset_uuid, [[1, 2], [3, 4]], [2, 0])
+            data = np.array([5, 6], dtype="<i2").tobytes()
+            db.setDatasetValuesByPointSelection(dset_uuid, data, [1], format="binary")
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, [[3, 4], [5, 6], [1, 2]])
+
+            fields = [
+                {"name": "a", "type": "H5T_STD_I32LE"},
+                {"name": "b", "type": "H5T_IEEE_F64LE"},
+            ]
+            datatype = {"class": "H5T_COMPOUND", "fields": fields}
+            rsp = db.createDataset(datatype, (3,))
+            dset_uuid = rsp["id"]
+            db.setDatasetValuesByUuid(dset_uuid, [[1, 1.5], [2, 2.5], [3, 3.5]])
+            db.setDatasetValuesByPointSelection(dset_uuid, [[7, 7.5]], [1])
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, [[1, 1.5], [7, 7.5], [3, 3.5]])
+
+    def testWriteVlenDatasetPoints(self):
+        filepath = getFile("empty.h5", "writevlendatasetpoints.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            datatype = {
+                "class": "H5T_VLEN",
+                "base": {"class": "H5T_INTEGER", "base": "H5T_STD_I32LE"},
+            }
+            rsp = db.createDataset(datatype, (4,))
+            dset_uuid = rsp["id"]
+            db.setDatasetValuesByPointSelection(dset_uuid, [[7, 8, 9]], [1])
+            db.setDatasetValuesByPointSelection(dset_uuid, [[4, 5], [1]], [3, 2])
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, [[], [7, 8, 9], [1], [4, 5]])
+            # more values than points
+            with self.assertRaises(IOError):
+                db.setDatasetValuesByPointSelection(dset_uuid, [[1], [2]], [0])
+
+            datatype = {
+                "class": "H5T_STRING",
+                "charSet": "H5T_CSET_UTF8",
+                "strPad": "H5T_STR_NULLTERM",
+                "length": "H5T_VARIABLE",
+            }
+            rsp = db.createDataset(datatype, (3,))
+            dset_uuid = rsp["id"]
+            db.setDatasetValuesByPointSelection(dset_uuid, ["ab", "cd"], [2, 0])
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, ["cd", "", "ab"])
+
+    def testWriteDatasetShape(self):
+        filepath = getFile("empty.h5", "writedatasetshape.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rsp = db.createDataset("H5T_STD_I32LE", (2, 3))
+            dset_uuid = rsp["id"]
+            # one row is broadcast to the whole selection
+            db.setDatasetValuesByUuid(dset_uuid, [1, 2, 3])
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, [[1, 2, 3], [1, 2, 3]])
+            for data in ([1, 2], [[1, 2, 3]] * 3):
+                with self.assertRaises(IOError):
+                    db.setDatasetValuesByUuid(dset_uuid, data)
+
     def testReadCompoundDataset(self):
         filepath = getFile("compound.h5", "readcompound.h5")
         with Hdf5db(filepath, app_logger=self.log) as db:
@@ -387,6 +614,30 @@ class Hdf5dbTest(unittest.TestCase):
             self.assertEqual(fillValue[3], 999.0)
             self.assertEqual(fillValue[4], "N")
 
+            # top-level changes to the returned props are not kept
+            creationProp["layout"] = {"class": "H5D_CHUNKED"}
+            dset_item = db.getDatasetItemByUuid(dset_uuid)
+            creationProp = dset_item["creationProperties"]
+            self.assertEqual(creationProp["layout"]["class"], "H5D_CONTIGUOUS")
+
+            db.deleteObjectByUuid("dataset", dset_uuid)
+            self.assertFalse(dset_uuid in db.hdf5_creation_props)
+
+    def testDatasetCreationProps(self):
+        filepath = getFile("tall.h5", "datasetcreationprops.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            d111Uuid = db.getUUIDByPath("/g1/g1.1/dset1.1.1")
+            self.assertEqual(db.getDatasetCreationProps(d111Uuid), {})
+            props = {"filters": [{"id": 1, "level": 9}, {"id": 999}]}
+            db.setDatasetCreationProps(d111Uuid, props)
+            for i in range(2):
+                prop_list = db.getDatasetCreationProps(d111Uuid)
+                filters = prop_list["filters"]
+                self.assertEqual(filters[0]["class"], "H5Z_FILTER_DEFLATE")
+                self.assertEqual(filters[1]["class"], "H5Z_FILTER_USER")
+                self.assertTrue("layout" not in prop_list)
+                prop_list["layout"] = {"class": "H5D_CHUNKED"}
+
     def testCreateScalarDataset(self):
         creation_props = {
             "allocTime": "H5D_ALLOC_TIME_LATE",
@@ -542,6 +793,17 @@ class Hdf5dbTest(unittest.TestCase):
             self.assertTrue("class" in shape_item)
             self.assertEqual(shape_item["class"], "H5S_NULL")
 
+    def testReadZeroExtentAttribute(self):
+        filepath = getFile("empty.h5", "readzeroextentattr.h5")
+        with h5py.File(filepath, "a") as f:
+            f.attrs["attr1"] = np.zeros((0,), dtype="i4")
+
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rootUuid = db.getUUIDByPath("/")
+            item = db.getAttributeItem("groups", rootUuid, "attr1")
+            self.assertEqual(item["shape"]["class"], "H5S_NULL")
+            self.assertTrue("value" not in item)
+
     def testReadAttribute(self):
         # getAttributeItemByUuid
         item = None
@@ -552,6 +814,44 @@ class Hdf5dbTest(unittest.TestCase):
             item = db.getAttributeItem("groups", rootUuid, "attr1")
             self.assertTrue(item is not None)
 
+    def testReadAttributeItems(self):
+        filepath = getFile("tall.h5", "readattributeitems.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rootUuid = db.getUUIDByPath("/")
+            items = db.getAttributeItems("groups", rootUuid)
+            self.assertEqual(len(items), 2)
+            for item in items:
+                self.assertTrue("value" not in item)
+            items = db.getAttributeItems("groups", rootUuid, includeData=True)
+            self.assertEqual(len(items), 2)
+            for item in items:
+                attr_item = db.getAttributeItem("groups", rootUuid, item["name"])
+                self.assertEqual(item["value"], attr_item["value"])
+                self.assertEqual(item["shape"], attr_item["shape"])
+
+    def testGetAttributeItemsBatch(self):
+        filepath = getFile("empty.h5", "getattributeitemsbatch.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            root_uuid = db.getUUIDByPath("/")
+            for i in range(10):
+                name = "A" + str(i)
+                db.createAttribute("groups", root_uuid, name, (), "H5T_STD_I32LE", i)
+            db.deleteAttribute("groups", root_uuid, "A3")
+            names = []
+            marker = None
+            while True:
+                batch = db.getAttributeItems(
+                    "groups", root_uuid, marker=marker, limit=4
+                )
+                if len(batch) == 0:
+                    break  # done!
+                names.extend(item["name"] for item in batch)
+                marker = batch[-1]["name"]
+            expected = ["A" + str(i) for i in range(10) if i != 3]
+            self.assertEqual(names, expected)
+            items = db.getAttributeItems("groups", root_uuid, marker="A3")
+            self.assertEqual(items, [])
+
     def testWriteScalarAttribute(self):
         # getAttributeItemByUuid
         item = None
@@ -769,6 +1069,51 @@ class Hdf5dbTest(unittest.TestCase):
             row = db.getDatasetValuesByUuid(dset_uuid, (slice(2, 3),), format="binary")
             self.assertEqual(row, b"sweet\x00\x00")
 
+    def testWriteDatasetBinary(self):
+        filepath = getFile("empty.h5", "writedatasetbinary.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rsp = db.createDataset("H5T_STD_I32LE", (4, 3))
+            dset_uuid = rsp["id"]
+            data = np.arange(12, dtype="<i4").tobytes()
+            db.setDatasetValuesByUuid(dset_uuid, data, format="binary")
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, np.arange(12).reshape(4, 3).tolist())
+            # wrong number of bytes
+            with self.assertRaises(IOError):
+                db.setDatasetValuesByUuid(dset_uuid, data[:-4], format="binary")
+
+            datatype = {"class": "H5T_ARRAY", "dims": [2], "base": "H5T_STD_I16LE"}
+            rsp = db.createDataset(datatype, (3,))
+            dset_uuid = rsp["id"]
+            data = np.arange(6, dtype="<i2").tobytes()
+            db.setDatasetValuesByUuid(dset_uuid, data, format="binary")
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            self.assertEqual(values, [[0, 1], [2, 3], [4, 5]])
+
+    def testWriteChunkBinary(self):
+        filepath = getFile("empty.h5", "writechunkbinary.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            creation_props = {"layout": {"class": "H5D_CHUNKED", "dims": [2, 3]}}
+            rsp = db.createDataset(
+                "H5T_STD_I32BE", (4, 6), creation_props=creation_props
+            )
+            dset_uuid = rsp["id"]
+            # exactly the second chunk of the second row of chunks
+            slices = (slice(2, 4, 1), slice(3, 6, 1))
+            data = np.arange(6, dtype=">i4").tobytes()
+            db.setDatasetValuesByUuid(dset_uuid, data, slices, format="binary")
+            # not aligned with the chunks
+            slices = (slice(0, 2, 1), slice(1, 4, 1))
+            db.setDatasetValuesByUuid(dset_uuid, data, slices, format="binary")
+            values = db.getDatasetValuesByUuid(dset_uuid)
+            expected = [
+                [0, 0, 1, 2, 0, 0],
+                [0, 3, 4, 5, 0, 0],
+                [0, 0, 0, 0, 1, 2],
+                [0, 0, 0, 3, 4, 5],
+            ]
+            self.assertEqual(values, expected)
+
     def testWriteVlenUnicodeAttribute(self):
         # getAttributeItemByUuid
         item = None
@@ -821,6 +1166,62 @@ class Hdf5dbTest(unittest.TestCase):
             self.assertEqual(item_type["class"], "H5T_INTEGER")
             self.assertEqual(item_type["base"], "H5T_STD_I16LE")
 
+    def testWrite2dFloatAttribute(self):
+        filepath = getFile("empty.h5", "write2dfloatattribute.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            root_uuid = db.getUUIDByPath("/")
+            dims = (2, 3)
+            datatype = "H5T_IEEE_F32LE"
+            value = [[0.5, 1.0, 1.5], [2.0, 2.5, 3.0]]
+            db.createAttribute("groups", root_uuid, "A1", dims, datatype, value)
+            item = db.getAttributeItem("groups", root_uuid, "A1")
+            self.assertEqual(item["value"], value)
+            self.assertEqual(list(item["shape"]["dims"]), [2, 3])
+            self.assertEqual(item["type"]["base"], "H5T_IEEE_F32LE")
+
+    def testWriteCompoundAttribute(self):
+        filepath = getFile("empty.h5", "writecompoundattribute.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            root_uuid = db.getUUIDByPath("/")
+            fields = [
+                {"name": "temp", "type": "H5T_STD_I32LE"},
+                {
+                    "name": "label",
+                    "type": {
+                        "class": "H5T_STRING",
+                        "charSet": "H5T_CSET_ASCII",
+                        "strPad": "H5T_STR_NULLPAD",
+                        "length": 4,
+                    },
+                },
+            ]
+            datatype = {"class": "H5T_COMPOUND", "fields": fields}
+            value = [[[1, "a"], [2, "bb"]], [[3, "ccc"], [4, "dddd"]]]
+            db.createAttribute("groups", root_uuid, "A1", (2, 2), datatype, value)
+            item = db.getAttributeItem("groups", root_uuid, "A1")
+            self.assertEqual(item["value"], value)
+            # wrong number of fields
+            with self.assertRaises(IOError):
+                db.createAttribute(
+                    "groups", root_uuid, "A2", (2,), datatype, [[1, "a"], [2]]
+                )
+
+    def testWriteVlenAttribute(self):
+        filepath = getFile("empty.h5", "writevlenattribute.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            root_uuid = db.getUUIDByPath("/")
+            datatype = {
+                "class": "H5T_VLEN",
+                "base": {"class": "H5T_INTEGER", "base": "H5T_STD_I32LE"},
+            }
+            value = [[1], [1, 2], [], [1, 2, 3]]
+            db.createAttribute("groups", root_uuid, "A1", (4,), datatype, value)
+            item = db.getAttributeItem("groups", root_uuid, "A1")
+            self.assertEqual(item["value"], value)
+            # elements must be sequences
+            with self.assertRaises(IOError):
+                db.createAttribute("groups", root_uuid, "A2", (2,), datatype, [1, 2])
+
     def testCreateReferenceAttribute(self):
         filepath = getFile("empty.h5", "createreferencedataset.h5")
         with Hdf5db(filepath, app_logger=self.log) as db:
@@ -888,6 +1289,30 @@ class Hdf5dbTest(unittest.TestCase):
             else:
                 self.assertEqual(base_type["class"], "H5T_OPAQUE")
 
+    def testCreateRegionReference(self):
+        filepath = getFile("empty.h5", "createregionreference.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            rsp = db.createDataset(
+                "H5T_STD_I32LE", (10, 10), max_shape=None, creation_props=None
+            )
+            dset_uuid = rsp["id"]
+            selection = [[[0, 0], [2, 3]], [[5, 5], [10, 6]]]
+            item = {
+                "select_type": "H5S_SEL_HYPERSLABS",
+                "id": dset_uuid,
+                "selection": selection,
+            }
+            region_ref = db.createRegionReference(item)
+            self.assertEqual(db.getRegionReference(region_ref), item)
+            # stop before start
+            item["selection"] = [[[0, 0], [2, 3]], [[5, 5], [4, 6]]]
+            with self.assertRaises(IOError):
+                db.createRegionReference(item)
+            # start with the wrong rank
+            item["selection"] = [[[0], [2, 3]]]
+            with self.assertRaises(IOError):
+                db.createRegionReference(item)
+
     def testCreateReferenceListAttribute(self):
         filepath = getFile("empty.h5", "createreferencelistattribute.h5")
         with Hdf5db(filepath, app_logger=self.log) as db:
@@ -973,6 +1398,11 @@ class Hdf5dbTest(unittest.TestCase):
             self.assertTrue("uuid" in item_type)
             self.assertEqual(item_type["uuid"], type_uuid)
 
+            # the uuid added for the dataset and attribute types is not
+            # part of the committed type's own item
+            item = db.getCommittedTypeItemByUuid(type_uuid)
+            self.assertFalse("uuid" in item["type"])
+
     def testWriteCommittedType(self):
         filepath = getFile("empty.h5", "writecommittedtype.h5")
         with Hdf5db(filepath, app_logger=self.log) as db:
@@ -1222,6 +1652,14 @@ class Hdf5dbTest(unittest.TestCase):
             acls = db.getAcls(d111_uuid)
             self.assertEqual(len(acls), 2)
 
+            # update user2 and verify the change is returned
+            db.setAcl(d111_uuid, {"userid": user2, "update": 1})
+            acl = db.getAcl(d111_uuid, user2)
+            self.assertEqual(acl["update"], 1)
+            self.assertEqual(acl["delete"], 0)
+            num_acls = db.getNumAcls(d111_uuid)
+            self.assertEqual(num_acls, 2)
+
     def testRootAcl(self):
         filepath = getFile("tall.h5", "rootacl.h5")
         user1 = 123
@@ -1266,6 +1704,7 @@ class Hdf5dbTest(unittest.TestCase):
             "(date >=22) & (date <= 24)": "(rows['date'] >=22) & (rows['date'] <= 24)",
             "(date == 21) & (temp > 70)": "(rows['date'] == 21) & (rows['temp'] > 70)",
             "(wind == b'E 7') | (wind == b'S 7')": "(rows['wind'] == b'E 7') | (rows['wind'] == b'S 7')",
+            "61 < temp": "61 < rows['temp']",
         }
 
         fields = ["date", "wind", "temp"]
@@ -1283,6 +1722,7 @@ class Hdf5dbTest(unittest.TestCase):
             "wind = b'abc",  # non-closed literal
             "(wind = b'N') & (temp = 32",  # missing paren
             "foobar > 42",  # invalid field name
+            "42 < foobar",  # invalid field name at the end
             "import subprocess; subprocess.call(['ls', '/'])",
         )  # injection attack
 
@@ -1296,6 +1736,28 @@ class Hdf5dbTest(unittest.TestCase):
                     self.assertTrue(False)  # shouldn't get here
                 except IOError:
                     pass  # ok
+            # field names that aren't allowed
+            with self.assertRaises(IOError):
+                db._getEvalStr("import > 1", fields + ("import",))
+
+    def testDatasetQuery(self):
+        filepath = getFile("compound.h5", "datasetquery.h5")
+        with Hdf5db(filepath, app_logger=self.log) as db:
+            dset_uuid = db.getUUIDByPath("/dset")
+            dset = db.getDatasetObjByUuid(dset_uuid)
+            data = dset[...]
+            expected = np.flatnonzero((data["temp"] > 60) & (data["wind"] == b"S 7"))
+            indexes, values = db.doDatasetQueryByUuid(
+                dset_uuid, "(temp > 60) & (wind == b'S 7')"
+            )
+            self.assertTrue(len(indexes) > 0)
+            self.assertEqual(indexes, expected.tolist())
+            self.assertEqual(len(values), len(indexes))
+            for index, value in zip(indexes, values):
+                self.assertEqual(value[2], data[index]["temp"])
+            # limit the number of matches
+            indexes, values = db.doDatasetQueryByUuid(dset_uuid, "temp > 0", limit=3)
+            self.assertEqual(indexes, [0, 1, 2])
 
     def testInjectionBlock(self):
         queries = (
@@ -95,6 +95,17 @@ class Hdf5dtypeTest(unittest.TestCase):
         self.assertEqual(mapp_out["GREEN"], 1)
         self.assertEqual(typeSize, 1)
 
+    def testCachedIntegerTypeItem(self):
+        # plain and enum types compare equal, make sure they aren't mixed up
+        typeItem = hdf5dtype.getTypeItem(np.dtype("<i2"))
+        self.assertEqual(typeItem, {"class": "H5T_INTEGER", "base": "H5T_STD_I16LE"})
+        typeItem["base"] = "modified"
+        dt = special_dtype(enum=(np.dtype("<i2"), {"A": 0, "B": 1}))
+        typeItem = hdf5dtype.getTypeItem(dt)
+        self.assertEqual(typeItem["class"], "H5T_ENUM")
+        typeItem = hdf5dtype.getTypeItem(np.dtype("<i2"))
+        self.assertEqual(typeItem["base"], "H5T_STD_I16LE")
+
     def testBaseBoolTypeItem(self):
         typeItem = hdf5dtype.getTypeItem(np.dtype("bool"))
         typeSize = hdf5dtype.getItemSize(typeItem)
@@ -281,6 +292,20 @@ class Hdf5dtypeTest(unittest.TestCase):
         self.assertEqual(tempFieldType["base"], "H5T_IEEE_F32LE")
         self.assertEqual(typeSize, 10)
 
+    def testTypeResponseCached(self):
+        dt = np.dtype([("temp", np.float32), ("label", "S8"), ("v", (np.int32, (2,)))])
+        typeItem = hdf5dtype.getTypeItem(dt)
+        response = hdf5dtype.getTypeResponse(typeItem)
+        cached = hdf5dtype.getTypeResponseCached(typeItem)
+        self.assertEqual(cached["class"], "H5T_COMPOUND")
+        self.assertEqual(len(cached["fields"]), 3)
+        self.assertEqual(cached["fields"][0], response["fields"][0])
+        self.assertEqual(cached["fields"][1], response["fields"][1])
+        self.assertEqual(list(cached["fields"][2]["type"]["dims"]), [2])
+        # same type should give the same (shared) response
+        typeItem = hdf5dtype.getTypeItem(dt)
+        self.assertTrue(hdf5dtype.getTypeResponseCached(typeItem) is cached)
+
     def testCompoundofCompoundTypeItem(self):
         dt1 = np.dtype([("x", np.float32), ("y", np.float32)])
         dt2 = np.dtype([("a", np.float32), ("b", np.float32), ("c", np.float32)])